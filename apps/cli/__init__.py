@@ -1,38 +1,107 @@
 import argparse
 import matplotlib.pyplot as plt
+from matplotlib.animation import FuncAnimation
 
 from tekscope import Oscilloscope
-from tekscope.transfer import retrieve_all_waveforms, retrieve_waveform
-from tekscope.io import save_waveform, save_waveforms, load_waveforms
+from tekscope.io import load_waveforms
+from tekscope.live import LiveFeed, FrameRate
 
 
 def transfer(args):
-    osc = Oscilloscope(host=args.host, port=args.port)
+    osc = Oscilloscope(host=args.host, port=args.port, profile=args.profile)
     output = args.output if args.output else "data.tek"
 
     with open(output, "wb") as f:
         if args.all:
-            wfs = osc.retrieve_all_waveforms()
-            save_waveforms(f, wfs)
+            osc.save_all_waveforms(f)
         elif args.source:
-            wf = osc.retrieve_waveform(args.source)
-            save_waveform(f, wf)
+            osc.save_waveform(args.source, f)
+    osc.close()
+    if osc.profiler is not None:
+        print(osc.profiler.report())
 
 
 def display(args):
     wfs = load_waveforms(args.tekfile)
     plt.figure()
     for wf in wfs.all():
-        plt.plot(wf.t(), wf.v(), label=wf.channel)
+        plt.plot(wf.time(), wf.voltage(), label=wf.channel)
     plt.legend()
     plt.show()
 
 
+def live(args):
+    osc = Oscilloscope(host=args.host, port=args.port, profile=args.profile)
+    sources = args.source or ["CH1"]
+    if args.negotiate:
+        osc.negotiate_data_format(sources[0])
+    feed = LiveFeed(
+        osc.soc, sources, args.points, args.start, args.stop, interval=1 / args.fps
+    )
+    drawn = FrameRate()
+
+    with osc.profiling(), feed:
+        sequence, frames = feed.wait(timeout=10.0)
+        fig, ax = plt.subplots()
+        lines = {}
+        for channel, frame in frames.items():
+            (lines[channel],) = ax.plot(
+                *frame.polyline(), label=channel, linewidth=0.8, animated=True
+            )
+        ax.margins(y=0.2)
+        ax.relim()
+        ax.autoscale_view()
+        ax.set_xlabel("Time (s)")
+        ax.set_ylabel("Voltage (V)")
+        ax.legend(loc="upper right")
+        fps = ax.text(0.01, 0.98, "", transform=ax.transAxes, va="top", animated=True)
+        artists = list(lines.values()) + [fps]
+
+        def update(_):
+            nonlocal sequence
+            latest, frames = feed.latest()
+            if latest != sequence:
+                sequence = latest
+                drawn.tick()
+                for channel, frame in frames.items():
+                    if channel in lines:
+                        lines[channel].set_data(*frame.polyline())
+            fps.set_text(
+                f"{drawn.rate():.1f} fps (transfer {feed.rate.rate():.1f} fps)"
+            )
+            return artists
+
+        # The animation must stay referenced while the window is open.
+        _animation = FuncAnimation(
+            fig,
+            update,
+            interval=1000 / args.fps,
+            blit=True,
+            cache_frame_data=False,
+        )
+        plt.show()
+    osc.close()
+    if osc.profiler is not None:
+        print(osc.profiler.report())
+
+
+def positive_float(value):
+    number = float(value)
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f"{value} is not a positive number")
+    return number
+
+
 parser = argparse.ArgumentParser(
     prog="tekscope", description="CLI for interacting with a Tektronix oscilloscope"
 )
 parser.add_argument("-H", "--host", default="169.254.8.194")
 parser.add_argument("-P", "--port", type=int, default=4000)
+parser.add_argument(
+    "--profile",
+    action="store_true",
+    help="Print the time and memory spent in each stage of the session.",
+)
 
 subparsers = parser.add_subparsers(required=True)
 
@@ -49,6 +118,21 @@ parser_display = subparsers.add_parser("display", help="Display waveforms.")
 parser_display.add_argument("tekfile")
 parser_display.set_defaults(func=display)
 
+parser_live = subparsers.add_parser(
+    "live", help="Display a decimated live view of waveforms."
+)
+parser_live.add_argument("-s", "--source", action="append")
+parser_live.add_argument("-n", "--points", type=int, default=1000)
+parser_live.add_argument("--fps", type=positive_float, default=30.0)
+parser_live.add_argument("--start", type=int, default=1)
+parser_live.add_argument("--stop", type=int)
+parser_live.add_argument(
+    "--negotiate",
+    action="store_true",
+    help="Transfer in the fastest data format that keeps the full resolution.",
+)
+parser_live.set_defaults(func=live)
+
 
 def main():
     args = parser.parse_args()
@@ -0,0 +1,156 @@
+"""
+Throughput benchmarks for `tekscope` with JSON baselines and regression checks.
+
+Run `python -m benchmarks run -o results.json` to record results and
+`python -m benchmarks compare baseline.json results.json` to flag regressions.
+"""
+
+import io
+import json
+import time
+import timeit
+import platform
+import contextlib
+
+import numpy as np
+
+DEFAULT_SIZES = [10**3, 10**4, 10**5, 10**6]
+FULL_SIZES = [10**3, 10**4, 10**5, 10**6, 10**7, 10**8]
+
+BENCHMARKS = {}
+
+
+def benchmark(name: str, sized: bool = True):
+    """
+    Registers a benchmark.
+
+    The decorated function is called with the number of samples (or `None` if
+    `sized` is false) and returns a zero-argument callable that performs one
+    iteration, or a `(callable, cleanup)` pair. Only the callable is timed.
+    """
+
+    def register(func):
+        BENCHMARKS[name] = (func, sized)
+        return func
+
+    return register
+
+
+def result_key(name: str, size: int) -> str:
+    """
+    Returns the key under which a benchmark result is stored.
+    """
+    return name if size is None else f"{name}[{size}]"
+
+
+def time_benchmark(func, repeats: int, min_time: float) -> (float, int):
+    """
+    Returns the best time of one iteration of `func` over `repeats` rounds,
+    along with the number of iterations per round.
+
+    Each round runs enough iterations to take at least `min_time` seconds.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        number = max(1, int(min_time / elapsed)) if elapsed > 0 else 1000
+        timer = timeit.Timer(func)
+        best = min(timer.repeat(repeat=repeats, number=number)) / number
+    return best, number
+
+
+def run(
+    names: [str] = None,
+    sizes: [int] = None,
+    repeats: int = 3,
+    min_time: float = 0.05,
+    log=print,
+) -> dict:
+    """
+    Runs the selected benchmarks at each size and returns the results.
+    """
+    sizes = sizes or DEFAULT_SIZES
+    names = names or list(BENCHMARKS)
+    results = {}
+    for name in names:
+        func, sized = BENCHMARKS[name]
+        for size in sizes if sized else [None]:
+            setup = func(size)
+            cleanup = None
+            if isinstance(setup, tuple):
+                setup, cleanup = setup
+            try:
+                seconds, number = time_benchmark(setup, repeats, min_time)
+            finally:
+                if cleanup is not None:
+                    cleanup()
+            result = {"seconds": seconds, "number": number}
+            if size is not None:
+                result["samples_per_second"] = size / seconds
+            key = result_key(name, size)
+            results[key] = result
+            log(f"{key:<32} {seconds * 1e3:12.4f} ms")
+
+    return {
+        "metadata": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def save(results: dict, path: str):
+    """
+    Saves benchmark results as JSON.
+    """
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2, sort_keys=True)
+
+
+def load(path: str) -> dict:
+    """
+    Loads benchmark results from JSON.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.1) -> [dict]:
+    """
+    Compares two sets of benchmark results.
+
+    Returns one entry per benchmark present in both, with the ratio of current
+    to baseline time and whether it is a regression, i.e. slower by more than
+    the fraction `threshold`. Benchmarks in the baseline but not in the current
+    results follow, marked as missing with a ratio of `None`.
+
+    >>> baseline = {"results": {"a": {"seconds": 1.0}, "b": {"seconds": 1.0}}}
+    >>> baseline["results"]["c"] = {"seconds": 1.0}
+    >>> current = {"results": {"a": {"seconds": 1.05}, "b": {"seconds": 1.5}}}
+    >>> [(c["name"], c["regression"], c["missing"]) for c in compare(baseline, current)]
+    [('a', False, False), ('b', True, False), ('c', False, True)]
+    """
+    comparisons = []
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+        ratio = result["seconds"] / baseline["results"][name]["seconds"]
+        comparisons.append(
+            {
+                "name": name,
+                "ratio": ratio,
+                "regression": ratio > 1 + threshold,
+                "missing": False,
+            }
+        )
+    for name in baseline["results"]:
+        if name not in current["results"]:
+            comparisons.append(
+                {"name": name, "ratio": None, "regression": False, "missing": True}
+            )
+    return comparisons
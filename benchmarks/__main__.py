@@ -0,0 +1,81 @@
+"""
+Command line interface for the benchmark suite.
+"""
+
+import sys
+import argparse
+
+from . import BENCHMARKS, DEFAULT_SIZES, FULL_SIZES, run, save, load, compare
+from . import suite  # pylint: disable=unused-import
+
+
+def run_command(args):
+    """
+    Runs the benchmarks and saves the results.
+    """
+    if args.sizes:
+        sizes = [int(float(size)) for size in args.sizes.split(",")]
+    else:
+        sizes = FULL_SIZES if args.full else DEFAULT_SIZES
+    names = args.benchmarks.split(",") if args.benchmarks else None
+    results = run(names, sizes, args.repeats, args.min_time)
+    save(results, args.output)
+    print(f"Saved results to {args.output}")
+
+
+def compare_command(args):
+    """
+    Compares two sets of results, exiting with status 1 if any regressed.
+    """
+    comparisons = compare(load(args.baseline), load(args.current), args.threshold)
+    regressions = 0
+    missing = 0
+    for comparison in comparisons:
+        if comparison["missing"]:
+            print(f"{comparison['name']:<32} {'':>9} MISSING")
+            missing += 1
+            continue
+        flag = "REGRESSION" if comparison["regression"] else ""
+        print(f"{comparison['name']:<32} {comparison['ratio']:8.3f}x {flag}")
+        regressions += comparison["regression"]
+    print(f"{regressions} regression(s) above {args.threshold:.0%}")
+    if missing:
+        print(f"{missing} benchmark(s) missing from {args.current}")
+    sys.exit(1 if regressions else 0)
+
+
+parser = argparse.ArgumentParser(
+    prog="python -m benchmarks", description="tekscope throughput benchmarks"
+)
+subparsers = parser.add_subparsers(required=True)
+
+parser_run = subparsers.add_parser("run", help="Run benchmarks.")
+parser_run.add_argument("-o", "--output", default="bench.json")
+parser_run.add_argument(
+    "-b", "--benchmarks", help=f"Comma-separated subset of {','.join(BENCHMARKS)}."
+)
+parser_run.add_argument("-s", "--sizes", help="Comma-separated sample counts.")
+parser_run.add_argument(
+    "--full", action="store_true", help="Run sizes up to 1e8 samples."
+)
+parser_run.add_argument("-r", "--repeats", type=int, default=3)
+parser_run.add_argument("--min-time", type=float, default=0.05)
+parser_run.set_defaults(func=run_command)
+
+parser_compare = subparsers.add_parser("compare", help="Compare two result files.")
+parser_compare.add_argument("baseline")
+parser_compare.add_argument("current")
+parser_compare.add_argument("-t", "--threshold", type=float, default=0.1)
+parser_compare.set_defaults(func=compare_command)
+
+
+def main():
+    """
+    Runs the benchmark command line interface.
+    """
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Benchmarks of the transfer, parsing, storage and expansion paths.
+"""
+
+import os
+import socket
+import tempfile
+import threading
+
+import numpy as np
+
+from tekscope import Oscilloscope
+from tekscope.raw import query_binary, AnalogSource
+from tekscope.simulator import SimulatedOscilloscope
+from tekscope.parse import parse_preamble, parse_curve, parse_ribinary_seq
+from tekscope.waveform import Waveform, WaveformMetadata
+from tekscope.io import write_waveform, read_waveform
+
+from . import benchmark
+
+# Per-session bandwidth of the simulator in the transfer benchmarks, in bytes/s.
+SIMULATOR_BANDWIDTH = 50e6
+
+PREAMBLE = (
+    b'1;8;BINARY;RI;MSB;"Ch1, DC coupling, 100.0mV/div, 400.0ns/div, 10000 points, '
+    b'Sample mode";10000;Y;LINEAR;"s";400.0000E-12;-20.0000E-6;0;"V";4.0000E-3;'
+    b"0.0E+0;0.0E+0;TIME;ANALOG;0.0E+0;0.0E+0;0.0E+0\n"
+)
+
+
+def samples(size: int) -> np.ndarray:
+    """
+    Returns `size` pseudo-random 8-bit samples.
+    """
+    return np.random.default_rng(0).integers(-128, 128, size, dtype=np.int8)
+
+
+def ieee_block(data: bytes) -> bytes:
+    """
+    Wraps data in an IEEE488.2 definite-length block.
+    """
+    length = str(len(data))
+    return f"#{len(length)}{length}".encode("utf-8") + data + b"\n"
+
+
+def waveform(size: int) -> Waveform:
+    """
+    Returns an example waveform with `size` samples stored as a Python list.
+    """
+    metadata = WaveformMetadata(400e-12, -20e-6, 4e-3, 0, 0)
+    return Waveform("CH1", metadata, samples(size).tolist())
+
+
+@benchmark("socket_recv")
+def socket_recv(size: int):
+    """
+    Receives an IEEE488.2 block over a local socket into a preallocated buffer.
+    """
+    block = ieee_block(samples(size).tobytes())
+    receiver, sender = socket.socketpair()
+    buffer = bytearray(size)
+
+    def iteration():
+        thread = threading.Thread(target=sender.sendall, args=(block,))
+        thread.start()
+        query_binary(receiver, buffer)
+        thread.join()
+
+    def cleanup():
+        receiver.close()
+        sender.close()
+
+    return iteration, cleanup
+
+
+@benchmark("ribinary_decode")
+def ribinary_decode(size: int):
+    """
+    Decodes RI binary data with the vectorized decoder.
+    """
+    data = samples(size).tobytes()
+    preamble = parse_preamble(PREAMBLE)
+    return lambda: parse_curve(data, preamble)
+
+
+@benchmark("ribinary_decode_list")
+def ribinary_decode_list(size: int):
+    """
+    Decodes RI binary data to a Python list.
+    """
+    data = samples(size).tobytes()
+    return lambda: parse_ribinary_seq(data, 1)
+
+
+@benchmark("metadata_parse", sized=False)
+def metadata_parse(_):
+    """
+    Parses a full WFMOUTPRE? response, bypassing the preamble cache.
+    """
+    return lambda: parse_preamble.__wrapped__(PREAMBLE)
+
+
+@benchmark("tek_write")
+def tek_write(size: int):
+    """
+    Writes a single waveform to a `.tek` file.
+    """
+    wf = waveform(size)
+    directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+    path = os.path.join(directory.name, "bench.tek")
+
+    def iteration():
+        with open(path, "wb") as file:
+            write_waveform(file, wf)
+
+    return iteration, directory.cleanup
+
+
+@benchmark("tek_read")
+def tek_read(size: int):
+    """
+    Reads a single waveform from a `.tek` file.
+    """
+    directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+    path = os.path.join(directory.name, "bench.tek")
+    with open(path, "wb") as file:
+        write_waveform(file, waveform(size))
+
+    def iteration():
+        with open(path, "rb") as file:
+            read_waveform(file)
+
+    return iteration, directory.cleanup
+
+
+@benchmark("expand_time")
+def expand_time(size: int):
+    """
+    Expands a waveform's timestamps with `Waveform.time`.
+    """
+    return waveform(size).time
+
+
+@benchmark("expand_voltage")
+def expand_voltage(size: int):
+    """
+    Expands a waveform's voltages with `Waveform.voltage`.
+    """
+    return waveform(size).voltage
+
+
+def simulator_transfer(size: int, connections: int):
+    """
+    Retrieves four channels from a bandwidth-limited simulator.
+    """
+    sim = SimulatedOscilloscope(
+        record_length=size,
+        sources=AnalogSource.SOURCES,
+        bandwidth=SIMULATOR_BANDWIDTH,
+    )
+    osc = Oscilloscope(sim.host, sim.port)
+
+    def iteration():
+        osc.retrieve_all_waveforms(connections=connections)
+
+    def cleanup():
+        osc.close()
+        sim.close()
+
+    return iteration, cleanup
+
+
+@benchmark("sim_transfer_serial")
+def sim_transfer_serial(size: int):
+    """
+    Retrieves four channels from the simulator over a single connection.
+    """
+    return simulator_transfer(size, 1)
+
+
+@benchmark("sim_transfer_parallel")
+def sim_transfer_parallel(size: int):
+    """
+    Retrieves four channels from the simulator over four connections.
+    """
+    return simulator_transfer(size, 4)
@@ -2,11 +2,30 @@
 API for interfacing with a Tektronix oscilloscope.
 """
 
-import socket
+import functools
+import contextlib
+
 from tekscope import raw
 from tekscope import parse
 from tekscope import transfer
 from tekscope import io
+from tekscope import acquisition
+from tekscope import watch
+from tekscope import profiler
+
+
+def _profiled(method):
+    """
+    Decorates an `Oscilloscope` method to record its stages with the profiler
+    of the session, if any.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.profiling():
+            return method(self, *args, **kwargs)
+
+    return wrapper
 
 
 class Oscilloscope:
@@ -15,10 +34,54 @@ class Oscilloscope:
     controlling a Tektronix oscilloscope.
     """
 
-    def __init__(self, host="169.254.8.194", port=4000):
-        self.soc = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.soc.connect((host, port))
-        raw.send_command(self.soc, raw.header_cmd(False))
+    def __init__(self, host="169.254.8.194", port=4000, profile=False):
+        """
+        Connects to the oscilloscope.
+
+        If `profile` is set, a `SessionProfiler` of this session is started once
+        connected and stored as `profiler` until the connection is closed. It
+        records the transfers made through this object, see `profiling`.
+        """
+        self.host = host
+        self.port = port
+        self.profiler = None
+        self.soc = raw.Connection(host, port)
+        if profile:
+            self.profiler = profiler.SessionProfiler()
+            self.profiler.start()
+
+    def close(self):
+        """
+        Closes the connection to the oscilloscope and stops its profiler, if any.
+        """
+        self.soc.close()
+        if self.profiler is not None:
+            self.profiler.stop()
+
+    def profiling(self):
+        """
+        Returns a context manager within which stages are recorded by the
+        profiler of this session, e.g. around a `LiveFeed` started on `soc`.
+        Does nothing if profiling is disabled.
+        """
+        if self.profiler is None:
+            return contextlib.nullcontext()
+        return self.profiler.activate()
+
+    def connect(self) -> raw.Connection:
+        """
+        Opens an additional connection to the oscilloscope that transfers
+        curves in the same data format as this one.
+        """
+        soc = raw.Connection(self.host, self.port)
+        soc.data_format = self.soc.data_format
+        return soc
+
+    def reconnect(self):
+        """
+        Re-establishes the connection to the oscilloscope, e.g. after a stalled transfer.
+        """
+        self.soc.reconnect()
 
     def send_raw_command(self, command):
         """
@@ -38,6 +101,13 @@ class Oscilloscope:
         """
         raw.send_command(self.soc, raw.acquire_state_cmd(raw.AcquireState.STOP))
 
+    def num_acq(self, timeout=None) -> int:
+        """
+        Retrieves the current number of acquisitions, waiting at most `timeout`
+        seconds for the reply.
+        """
+        return acquisition.num_acq(self.soc, timeout)
+
     def acquire_analog_sequence(self, num_acq: int, source: str) -> [int]:
         """
         Acquires an analog sequence of the given length and parses it as a Python list.
@@ -58,11 +128,26 @@ class Oscilloscope:
         raw.send_command(self.soc, raw.curve_cmd())
         return parse.parse_ribinary_seq(raw.query_binary(self.soc), 1)
 
-    def retrieve_waveform(self, source: str) -> [int]:
+    @_profiled
+    def retrieve_waveform(self, source: str, timeout=None, retries=0) -> [int]:
         """
         Retrieves a waveform from the oscilloscope.
+
+        `timeout` bounds every query and the curve transfer in seconds. If
+        `retries` is nonzero, a curve transfer that stalls or drops is resumed
+        over a new connection.
+        """
+        return transfer.retrieve_waveform(self.soc, source, timeout, retries)
+
+    def negotiate_data_format(self, source="CH1", bit_nr=None) -> (str, int):
         """
-        return transfer.retrieve_waveform(self.soc, source)
+        Selects the fastest data format that preserves the resolution of
+        `source`, as in `transfer.negotiate_data_format`, and returns it.
+
+        Every later retrieval uses the selected format. Saves still transfer
+        8-bit RI binary data, since `.tek` files hold 8-bit samples.
+        """
+        return transfer.negotiate_data_format(self.soc, source, bit_nr)
 
     def retrieve_waveform_parameters(self, source: str):
         """
@@ -70,8 +155,56 @@ class Oscilloscope:
         """
         return transfer.retrieve_waveform_parameters(self.soc, source)
 
-    def retrieve_all_waveforms(self):
+    @_profiled
+    def retrieve_all_waveforms(self, timeout=None, retries=0, connections=1):
         """
         Retrieves all waveforms from the oscilloscope.
+
+        See `retrieve_waveform` for `timeout` and `retries`. If `connections` is
+        greater than 1, that many additional connections are opened and channels
+        are transferred over them in parallel. This requires an oscilloscope
+        whose socket server keeps independent settings for each session, and
+        does not support `retries`.
+        """
+        if connections > 1 and retries > 0:
+            raise ValueError("retries are not supported with parallel connections")
+        if connections > 1:
+            return transfer.retrieve_all_waveforms_parallel(
+                self.connect,
+                connections,
+                timeout=timeout,
+            )
+        return transfer.retrieve_all_waveforms(self.soc, timeout, retries)
+
+    @_profiled
+    def save_waveform(self, source: str, file, timeout=None) -> bool:
         """
-        return transfer.retrieve_all_waveforms(self.soc)
+        Streams a waveform from the oscilloscope straight into a `.tek` IO stream
+        without decoding it.
+        """
+        transfer.set_default_waveform_settings(
+            self.soc, raw.DataEncdg.BINARY, 1, timeout
+        )
+        return transfer.save_waveform_passthrough(self.soc, source, file, timeout)
+
+    @_profiled
+    def save_all_waveforms(self, file, timeout=None) -> [str]:
+        """
+        Streams all waveforms from the oscilloscope straight into a `.tek` IO
+        stream without decoding them.
+        """
+        return transfer.save_all_waveforms_passthrough(self.soc, file, timeout)
+
+    @_profiled
+    def watch(
+        self, interval=0.1, max_interval=2.0, skip_stale=True, timeout=None
+    ) -> watch.Watcher:
+        """
+        Returns a `Watcher` that yields all waveforms from the oscilloscope
+        whenever a new acquisition completes.
+
+        `timeout` bounds every query and curve transfer in seconds.
+        """
+        return watch.Watcher(
+            self.soc, interval, max_interval, skip_stale=skip_stale, timeout=timeout
+        )
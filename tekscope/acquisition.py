@@ -6,9 +6,10 @@ import socket
 from .raw import send_command, query_ascii, acquire_numacq_cmd
 
 
-def num_acq(soc: socket.socket) -> int:
+def num_acq(soc: socket.socket, timeout: float = None) -> int:
     """
-    Retrieves the current number of acquisitions from the oscilloscope.
+    Retrieves the current number of acquisitions from the oscilloscope, raising
+    `socket.timeout` if it does not arrive within `timeout` seconds.
     """
     send_command(soc, acquire_numacq_cmd())
-    return int(query_ascii(soc))
+    return int(query_ascii(soc, timeout))
@@ -0,0 +1,206 @@
+"""
+Utilities for averaging repeated captures of a waveform.
+"""
+
+import numpy as np
+
+from .waveform import WaveformMetadata, Waveform
+
+
+def find_crossing(samples: np.ndarray, level: float) -> float:
+    """
+    Returns the fractional index of the first rising crossing of `level`, found by
+    linear interpolation between neighbouring samples.
+
+    Returns `None` if the samples never cross `level`.
+
+    >>> find_crossing(np.array([0, 0, 2, 4]), 1)
+    1.5
+    """
+    below = samples[:-1] < level
+    above = samples[1:] >= level
+    crossings = np.flatnonzero(below & above)
+    if len(crossings) == 0:
+        return None
+    i = crossings[0]
+    before, after = float(samples[i]), float(samples[i + 1])
+    return float(i + (level - before) / (after - before))
+
+
+# pylint: disable-next=too-many-instance-attributes
+class WaveformAccumulator:
+    """
+    Class for accumulating running statistics over repeated captures of a waveform.
+
+    Only running sums, sums of squares and min/max envelopes are stored, so memory
+    use is independent of the number of captures.
+    """
+
+    def __init__(
+        self,
+        channel: str = None,
+        metadata: WaveformMetadata = None,
+        trigger_level: float = None,
+    ):
+        """
+        Initializes a `WaveformAccumulator` object.
+
+        `channel`: The channel of the accumulated captures. Taken from the first
+            `Waveform` added if not provided.
+        `metadata`: Metadata shared by all captures. Taken from the first
+            `Waveform` added if not provided.
+        `trigger_level`: If provided, the voltage of a rising edge used to align
+            each capture to the first one with sub-sample precision. Captures
+            that never cross this level are rejected.
+
+        Without alignment, statistics are kept in exact integer arrays. With
+        alignment, captures are interpolated, so statistics are kept in floats.
+        """
+        self.channel = channel
+        self.metadata = metadata
+        self.trigger_level = trigger_level
+        self.count = 0
+        self.rejected = 0
+        self.reference = None
+        self.sum = None
+        self.sum_sq = None
+        self.min = None
+        self.max = None
+
+    def _allocate(self, length: int):
+        """
+        Allocates the running statistics for captures of the given length.
+        """
+        dtype = np.int64 if self.trigger_level is None else np.float64
+        self.sum = np.zeros(length, dtype=dtype)
+        self.sum_sq = np.zeros(length, dtype=dtype)
+        self.min = np.full(length, np.inf)
+        self.max = np.full(length, -np.inf)
+
+    def _align(self, samples: np.ndarray) -> np.ndarray:
+        """
+        Shifts the samples so that their trigger crossing matches the reference.
+
+        Returns `None` if the samples never cross the trigger level.
+        """
+        metadata = self.metadata
+        level = (
+            self.trigger_level - metadata.v_zero
+        ) / metadata.v_mult + metadata.v_off
+        if metadata.v_mult < 0:
+            crossing = find_crossing(-samples, -level)
+        else:
+            crossing = find_crossing(samples, level)
+        if crossing is None:
+            return None
+        if self.reference is None:
+            self.reference = crossing
+
+        indices = np.arange(len(samples), dtype=np.float64)
+        return np.interp(indices + (crossing - self.reference), indices, samples)
+
+    def add(self, capture) -> bool:
+        """
+        Adds a capture, given as a `Waveform` or a sequence of raw digitized values.
+
+        Returns whether the capture was accumulated.
+        """
+        if isinstance(capture, Waveform):
+            if self.channel is None:
+                self.channel = capture.channel
+            if self.metadata is None:
+                self.metadata = capture.metadata
+            capture = capture.raw_data
+        samples = np.asarray(capture)
+
+        if self.sum is None:
+            self._allocate(len(samples))
+        elif len(samples) != len(self.sum):
+            raise ValueError(
+                f"capture has {len(samples)} samples, expected {len(self.sum)}"
+            )
+
+        if self.trigger_level is not None:
+            if self.metadata is None:
+                raise ValueError("metadata is required for trigger alignment")
+            samples = self._align(samples.astype(np.float64))
+            if samples is None:
+                self.rejected += 1
+                return False
+        else:
+            samples = samples.astype(np.int64)
+
+        self.sum += samples
+        self.sum_sq += samples * samples
+        np.minimum(self.min, samples, out=self.min)
+        np.maximum(self.max, samples, out=self.max)
+        self.count += 1
+        return True
+
+    def extend(self, captures):
+        """
+        Adds every capture from an iterable, such as a generator of streamed captures.
+        """
+        for capture in captures:
+            self.add(capture)
+
+    def _check_count(self):
+        """
+        Ensures that at least one capture has been accumulated.
+        """
+        if self.count == 0:
+            raise ValueError("no captures have been accumulated")
+
+    def mean(self) -> Waveform:
+        """
+        Returns the mean of all accumulated captures as a `Waveform`.
+
+        The raw data of the result is in (fractional) digitizing levels, so
+        `voltage()` works as usual.
+        """
+        self._check_count()
+        return Waveform(self.channel, self.metadata, self.sum / self.count)
+
+    def std(self) -> Waveform:
+        """
+        Returns the sample standard deviation of all accumulated captures as a
+        `Waveform`.
+
+        The raw data of the result is in (fractional) digitizing levels, with
+        metadata whose voltage offsets are zero, so `voltage()` returns the
+        standard deviation in volts. The metadata is `None` if the captures had
+        none, as in `mean`. Returns zeros if only one capture has been
+        accumulated.
+        """
+        self._check_count()
+        metadata = self.metadata
+        std_metadata = None
+        if metadata is not None:
+            std_metadata = WaveformMetadata(
+                metadata.t_incr, metadata.t_zero, abs(metadata.v_mult), 0.0, 0.0
+            )
+        if self.count == 1:
+            return Waveform(self.channel, std_metadata, np.zeros(len(self.sum)))
+        mean = self.sum / self.count
+        variance = (self.sum_sq - mean * self.sum) / (self.count - 1)
+        return Waveform(self.channel, std_metadata, np.sqrt(np.maximum(variance, 0)))
+
+    def envelope(self) -> (Waveform, Waveform):
+        """
+        Returns the pointwise minimum and maximum of all accumulated captures as
+        a pair of `Waveform` objects.
+        """
+        self._check_count()
+        return (
+            Waveform(self.channel, self.metadata, self.min.copy()),
+            Waveform(self.channel, self.metadata, self.max.copy()),
+        )
+
+
+def accumulate(captures, trigger_level: float = None) -> WaveformAccumulator:
+    """
+    Accumulates an iterable of captures, returning the resulting `WaveformAccumulator`.
+    """
+    accumulator = WaveformAccumulator(trigger_level=trigger_level)
+    accumulator.extend(captures)
+    return accumulator
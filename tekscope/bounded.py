@@ -0,0 +1,259 @@
+"""
+A `Waveforms` container that keeps its memory use within a budget by spilling
+least recently used waveforms to disk.
+"""
+
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+
+from .waveform import Waveform, Waveforms
+from .io import write_waveform_header, as_tek_raw_data
+
+DEFAULT_MEMORY_BUDGET = 256 << 20
+
+
+def _num_bytes(raw_data) -> int:
+    """
+    Returns the number of bytes of memory held by raw data.
+
+    Lists are counted at one pointer per sample.
+    """
+    if isinstance(raw_data, np.ndarray):
+        return 0 if isinstance(raw_data, np.memmap) else raw_data.nbytes
+    return len(raw_data) * 8
+
+
+# pylint: disable-next=too-few-public-methods
+class SpilledWaveform:
+    """
+    Class for locating the raw data of an evicted waveform in the spill file.
+    """
+
+    __slots__ = ("waveform", "offset", "dtype", "length")
+
+    def __init__(self, waveform: Waveform, offset: int, dtype: np.dtype, length: int):
+        """
+        Initializes a `SpilledWaveform` object.
+
+        `waveform`: The evicted waveform, without its raw data.
+        `offset`: The file offset of the raw data.
+        `dtype`: The dtype of the raw data.
+        `length`: The number of samples.
+        """
+        self.waveform = waveform
+        self.offset = offset
+        self.dtype = dtype
+        self.length = length
+
+
+# pylint: disable-next=too-many-instance-attributes
+class BoundedWaveforms(Waveforms):
+    """
+    Class for storing multiple waveforms within a memory budget.
+
+    When the raw data held in memory exceeds the budget, the least recently used
+    waveforms are appended to a temporary `.tek` spill file and dropped from
+    memory. Spilled waveforms are faulted back in on `get()`, evicting others
+    in turn. Waveforms are treated as immutable, so a waveform that is evicted
+    again is not rewritten.
+    """
+
+    def __init__(
+        self,
+        waveforms: [Waveform] = (),
+        memory_budget: int = DEFAULT_MEMORY_BUDGET,
+        spill_dir: str = None,
+    ):
+        """
+        Initializes a `BoundedWaveforms` object.
+
+        `waveforms`: The waveforms contained in this object.
+        `memory_budget`: Maximum number of bytes of raw data to keep in memory.
+        `spill_dir`: Directory of the spill file. Defaults to the system
+            temporary directory.
+
+        The `hits`, `misses` and `evictions` counters track `get()` calls served
+        from memory, `get()` calls served from the spill file and waveforms
+        dropped from memory respectively.
+        """
+        super().__init__([])
+        self.waveform_dict = OrderedDict()
+        self.channels = {}
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self.spill_file = None
+        self.spilled = {}
+        self.resident_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        for waveform in waveforms:
+            self.add(waveform)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Deletes the spill file. Spilled waveforms can no longer be retrieved.
+        """
+        for channel in self.spilled:
+            if channel not in self.waveform_dict:
+                del self.channels[channel]
+        if self.spill_file is not None:
+            self.spill_file.close()
+            self.spill_file = None
+        self.spilled.clear()
+
+    def stats(self) -> dict:
+        """
+        Returns a dictionary of cache statistics.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "resident": len(self.waveform_dict),
+            "spilled": len(self.channels) - len(self.waveform_dict),
+            "resident_bytes": self.resident_bytes,
+        }
+
+    def add(self, waveform: Waveform):
+        """
+        Adds a waveform, replacing any existing waveform for the same channel,
+        and evicts least recently used waveforms to stay within the budget.
+        """
+        self.channels[waveform.channel] = None
+        self._discard(waveform.channel)
+        self.spilled.pop(waveform.channel, None)
+        self._insert(waveform)
+
+    def _discard(self, channel: str):
+        """
+        Drops a waveform from memory without spilling it.
+        """
+        waveform = self.waveform_dict.pop(channel, None)
+        if waveform is not None:
+            self.resident_bytes -= _num_bytes(waveform.raw_data)
+
+    def _insert(self, waveform: Waveform):
+        """
+        Makes a waveform resident as the most recently used one.
+        """
+        self.waveform_dict[waveform.channel] = waveform
+        self.resident_bytes += _num_bytes(waveform.raw_data)
+        self._evict(keep=waveform.channel)
+
+    def _evict(self, keep: str):
+        """
+        Evicts least recently used waveforms other than `keep` until the data
+        held in memory fits the budget. Memory-mapped waveforms are left alone.
+        """
+        for channel, waveform in list(self.waveform_dict.items()):
+            if self.resident_bytes <= self.memory_budget:
+                break
+            if channel == keep or _num_bytes(waveform.raw_data) == 0:
+                continue
+            if channel not in self.spilled:
+                self._spill(waveform)
+            self._discard(channel)
+            self.evictions += 1
+
+    def _spill(self, waveform: Waveform):
+        """
+        Appends a waveform to the spill file.
+
+        8-bit data, including lists as returned by `io.load_waveforms`, is
+        stored as a regular `.tek` record. Wider data is stored with its byte
+        length in the header, and its dtype kept in memory.
+        """
+        if self.spill_file is None:
+            # pylint: disable-next=consider-using-with
+            self.spill_file = tempfile.TemporaryFile(suffix=".tek", dir=self.spill_dir)
+        if isinstance(waveform.raw_data, np.ndarray):
+            raw_data = np.ascontiguousarray(waveform.raw_data)
+        else:
+            raw_data = as_tek_raw_data(waveform.raw_data)
+        if raw_data.dtype.hasobject:
+            raise TypeError(
+                f"cannot spill {waveform.channel} with dtype {raw_data.dtype}"
+            )
+
+        file = self.spill_file
+        file.seek(0, 2)
+        write_waveform_header(
+            file, waveform.channel, waveform.metadata, raw_data.nbytes
+        )
+        offset = file.tell()
+        file.write(raw_data.data)
+        self.spilled[waveform.channel] = SpilledWaveform(
+            Waveform(waveform.channel, waveform.metadata, None),
+            offset,
+            raw_data.dtype,
+            len(raw_data),
+        )
+
+    def _map(self, channel: str) -> Waveform:
+        """
+        Returns a spilled waveform whose raw data is memory-mapped from the spill file.
+        """
+        spilled = self.spilled[channel]
+        self.spill_file.flush()
+        if spilled.length > 0:
+            raw_data = np.memmap(
+                self.spill_file,
+                dtype=spilled.dtype,
+                mode="r",
+                offset=spilled.offset,
+                shape=(spilled.length,),
+            )
+        else:
+            raw_data = np.zeros(0, dtype=spilled.dtype)
+        waveform = spilled.waveform
+        return Waveform(waveform.channel, waveform.metadata, raw_data)
+
+    def get(self, channel: str) -> Waveform:
+        """
+        Returns a `Waveform` object corresponding to the given channel, faulting
+        it back into memory if it was spilled.
+
+        Faulted-in raw data is a NumPy array. Waveforms larger than the whole
+        budget are returned memory-mapped instead. Returns `None` if no such
+        object exists.
+        """
+        waveform = self.waveform_dict.get(channel)
+        if waveform is not None:
+            self.hits += 1
+            self.waveform_dict.move_to_end(channel)
+            return waveform
+        if channel not in self.spilled:
+            return None
+
+        self.misses += 1
+        waveform = self._map(channel)
+        if waveform.raw_data.nbytes > self.memory_budget:
+            return waveform
+        waveform.raw_data = np.array(waveform.raw_data)
+        self._insert(waveform)
+        return waveform
+
+    def all(self) -> [Waveform]:
+        """
+        Returns a list of all waveforms stored in this object.
+
+        Spilled waveforms are returned memory-mapped, without faulting them in
+        or counting towards the statistics.
+        """
+        return [
+            (
+                self.waveform_dict[channel]
+                if channel in self.waveform_dict
+                else self._map(channel)
+            )
+            for channel in self.channels
+        ]
@@ -0,0 +1,293 @@
+"""
+Utilities for indexing the headers of many `.tek` files in an SQLite catalog.
+"""
+
+import os
+import struct
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from .waveform import METADATA_FIELDS, WaveformMetadata, Waveform
+from .io import scan_waveform_headers, memmap_raw_data
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS waveforms (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    {", ".join(f"{field} REAL NOT NULL" for field in METADATA_FIELDS)},
+    num_samples INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    PRIMARY KEY (file_id, position)
+);
+CREATE INDEX IF NOT EXISTS waveforms_channel ON waveforms (channel, v_mult, t_incr);
+CREATE INDEX IF NOT EXISTS waveforms_t_incr ON waveforms (t_incr);
+CREATE INDEX IF NOT EXISTS waveforms_num_samples ON waveforms (num_samples);
+"""
+
+COLUMNS = ("channel",) + METADATA_FIELDS + ("num_samples", "offset")
+
+OPERATORS = {
+    "eq": "=",
+    "ne": "!=",
+    "lt": "<",
+    "le": "<=",
+    "gt": ">",
+    "ge": ">=",
+}
+
+
+# pylint: disable-next=too-few-public-methods
+class CatalogEntry:
+    """
+    Class for storing the catalogued header of one waveform in a `.tek` file.
+    """
+
+    __slots__ = ("path", "channel", "metadata", "num_samples", "offset")
+
+    # pylint: disable-next=too-many-arguments
+    def __init__(
+        self,
+        path: str,
+        channel: str,
+        metadata: WaveformMetadata,
+        num_samples: int,
+        offset: int,
+    ):
+        """
+        Initializes a `CatalogEntry` object.
+
+        `path`: The path of the file containing the waveform.
+        `channel`: The channel of the waveform.
+        `metadata`: The metadata of the waveform.
+        `num_samples`: The number of samples of the waveform.
+        `offset`: The file offset of the raw data of the waveform.
+        """
+        self.path = path
+        self.channel = channel
+        self.metadata = metadata
+        self.num_samples = num_samples
+        self.offset = offset
+
+    def load(self) -> Waveform:
+        """
+        Returns the catalogued waveform with its raw data memory-mapped from the file.
+        """
+        return Waveform(
+            self.channel,
+            self.metadata,
+            memmap_raw_data(self.path, self.offset, self.num_samples),
+        )
+
+
+def _scan(path: str) -> [tuple]:
+    """
+    Reads the headers of a `.tek` file as catalog rows.
+
+    Raises `ValueError` if the file is truncated or malformed.
+    """
+    size = os.path.getsize(path)
+    try:
+        headers = scan_waveform_headers(path)
+    except (struct.error, UnicodeDecodeError) as err:
+        raise ValueError(f"{path} is not a valid .tek file: {err}") from err
+    rows = []
+    for position, (channel, metadata, offset, raw_data_len) in enumerate(headers):
+        if offset + raw_data_len > size:
+            raise ValueError(f"{path} is truncated in {channel}")
+        rows.append(
+            (position, channel)
+            + tuple(getattr(metadata, field) for field in METADATA_FIELDS)
+            + (raw_data_len, offset)
+        )
+    return rows
+
+
+def _try_scan(path: str) -> ([tuple], str):
+    """
+    Reads the headers of a `.tek` file as in `_scan`, returning the rows and
+    `None`, or `None` and an error message if the file cannot be read.
+    """
+    try:
+        return _scan(path), None
+    except (OSError, ValueError) as err:
+        return None, str(err)
+
+
+def _where(conditions: {str: object}) -> (str, list):
+    """
+    Translates the conditions of `Catalog.find` into an SQL `WHERE` clause,
+    which is empty if there are no conditions, and its parameters.
+    """
+    clauses = []
+    params = []
+    for key, value in conditions.items():
+        column, _, op = key.partition("__")
+        if column not in COLUMNS or (op or "eq") not in OPERATORS:
+            raise ValueError(f"unsupported condition {key!r}")
+        clauses.append(f"w.{column} {OPERATORS[op or 'eq']} ?")
+        params.append(value)
+    if not clauses:
+        return "", params
+    return " WHERE " + " AND ".join(clauses), params
+
+
+def _find_files(root: str, extension: str) -> [str]:
+    """
+    Returns the absolute paths of all files below `root` with the given extension.
+    """
+    paths = []
+    for directory, _, names in os.walk(root):
+        paths.extend(
+            os.path.abspath(os.path.join(directory, name))
+            for name in names
+            if name.endswith(extension)
+        )
+    return sorted(paths)
+
+
+class Catalog:
+    """
+    Class for searching the headers of many `.tek` files without loading them.
+
+    Only headers are read, and they are stored in an SQLite database together
+    with the offset of each waveform's raw data, so matching waveforms can be
+    memory-mapped directly.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initializes a `Catalog` object, creating the database at `path` if needed.
+        Use ":memory:" for a catalog that is not persisted.
+        """
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA foreign_keys = ON")
+        self.db.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Closes the database.
+        """
+        self.db.close()
+
+    def update(
+        self, root: str, extension: str = ".tek", workers: int = None
+    ) -> {str: object}:
+        """
+        Brings the catalog up to date with the `.tek` files below `root`.
+
+        Files whose size and modification time are unchanged are skipped, new or
+        changed files are scanned in parallel with `workers` threads, and
+        catalogued files below `root` that no longer exist are removed. Files
+        that cannot be parsed are left out of the catalog.
+
+        Returns a dictionary with the number of `added`, `updated`, `removed`
+        and `unchanged` files, and a list of `errors` as `(path, message)` tuples.
+        """
+        known = self._known_files(root)
+        stale = []
+        unchanged = 0
+        for path in _find_files(root, extension):
+            stat = os.stat(path)
+            current = (stat.st_size, stat.st_mtime_ns)
+            if path in known and known.pop(path)[1:] == current:
+                unchanged += 1
+            else:
+                stale.append((path, current))
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_try_scan, [path for path, _ in stale]))
+
+        stats = self._store(known, stale, results)
+        stats["unchanged"] = unchanged
+        return stats
+
+    def _known_files(self, root: str) -> {str: (int, int, int)}:
+        """
+        Returns the id, size and modification time of every catalogued file
+        below `root`, keyed by path.
+        """
+        prefix = os.path.join(os.path.abspath(root), "")
+        return {
+            path: (file_id, size, mtime_ns)
+            for file_id, path, size, mtime_ns in self.db.execute(
+                "SELECT id, path, size, mtime_ns FROM files WHERE substr(path, 1, ?) = ?",
+                (len(prefix), prefix),
+            )
+        }
+
+    def _store(self, removed: dict, stale: [tuple], results: [tuple]) -> {str: object}:
+        """
+        Deletes the `removed` files, as returned by `_known_files`, and replaces
+        the rows of the `stale` files with their scan `results` in one
+        transaction. Returns the statistics of `update` except `unchanged`.
+        """
+        stats = {"added": 0, "updated": 0, "removed": len(removed), "errors": []}
+        with self.db:
+            self.db.executemany(
+                "DELETE FROM files WHERE id = ?",
+                [(file_id,) for file_id, _, _ in removed.values()],
+            )
+            for (path, (size, mtime_ns)), (rows, error) in zip(stale, results):
+                existing = self.db.execute(
+                    "DELETE FROM files WHERE path = ?", (path,)
+                ).rowcount
+                if error is not None:
+                    stats["errors"].append((path, error))
+                    stats["removed"] += existing
+                    continue
+                stats["updated" if existing else "added"] += 1
+                file_id = self.db.execute(
+                    "INSERT INTO files (path, size, mtime_ns) VALUES (?, ?, ?)",
+                    (path, size, mtime_ns),
+                ).lastrowid
+                self.db.executemany(
+                    f"INSERT INTO waveforms VALUES ({', '.join('?' * (len(COLUMNS) + 2))})",
+                    [(file_id,) + row for row in rows],
+                )
+        return stats
+
+    def find(self, **conditions) -> [CatalogEntry]:
+        """
+        Returns the catalogued waveforms matching all of the given conditions,
+        ordered by path and position within the file.
+
+        Conditions are given as `<column>=<value>` or `<column>__<op>=<value>`,
+        where `<column>` is `channel`, a metadata field, `num_samples` or `offset`
+        and `<op>` is one of `eq`, `ne`, `lt`, `le`, `gt` or `ge`. For example,
+        `find(channel="CH2", v_mult=20e-3, t_incr__lt=1e-9)`.
+        """
+        where, params = _where(conditions)
+        query = (
+            f"SELECT f.path, {', '.join(f'w.{column}' for column in COLUMNS)} "
+            f"FROM waveforms w JOIN files f ON f.id = w.file_id{where} "
+            "ORDER BY f.path, w.position"
+        )
+
+        entries = []
+        for path, channel, *values in self.db.execute(query, params):
+            metadata = WaveformMetadata(*values[: len(METADATA_FIELDS)])
+            num_samples, offset = values[len(METADATA_FIELDS) :]
+            entries.append(CatalogEntry(path, channel, metadata, num_samples, offset))
+        return entries
+
+    def files(self) -> [str]:
+        """
+        Returns the paths of all catalogued files.
+        """
+        return [
+            path for (path,) in self.db.execute("SELECT path FROM files ORDER BY path")
+        ]
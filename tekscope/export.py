@@ -0,0 +1,320 @@
+"""
+Utilities for exporting waveforms to and importing waveforms from scientific formats.
+
+Only raw digitized samples and metadata are stored, so no float expansion happens
+on either side. NumPy `.npz` archives are always supported. HDF5 and Parquet
+support require `h5py` and `pyarrow` respectively.
+"""
+
+import json
+import struct
+import zipfile
+import importlib
+from urllib.parse import quote, unquote
+
+import numpy as np
+
+from .waveform import METADATA_FIELDS, WaveformMetadata, Waveform, Waveforms
+from .io import memmap_waveforms
+
+METADATA_KEY = "__metadata__"
+CHANNEL_KEY = "channel"
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+
+def _require(module: str):
+    """
+    Imports an optional dependency, raising a helpful error if it is missing.
+    """
+    try:
+        return importlib.import_module(module)
+    except ImportError as err:
+        package = module.split(".", maxsplit=1)[0]
+        raise ImportError(
+            f"`{package}` is required for this format; install it with `pip install {package}`"
+        ) from err
+
+
+def _waveforms(source) -> Waveforms:
+    """
+    Resolves a `Waveforms` object or the path of a `.tek` file to a `Waveforms` object.
+
+    Files are memory-mapped, so samples are only read as they are exported.
+    """
+    if isinstance(source, Waveforms):
+        return source
+    return memmap_waveforms(source)
+
+
+def _raw_dtype(raw_data) -> np.dtype:
+    """
+    Returns the dtype used to store the given raw data.
+
+    Arrays keep their own dtype. Lists use the 8-bit signed format of `.tek` files.
+    """
+    if isinstance(raw_data, np.ndarray):
+        return raw_data.dtype
+    return np.dtype(np.int8)
+
+
+def _chunks(raw_data, chunk_size: int):
+    """
+    Yields successive chunks of raw data as NumPy arrays.
+    """
+    dtype = _raw_dtype(raw_data)
+    for start in range(0, len(raw_data), chunk_size):
+        yield np.asarray(raw_data[start : start + chunk_size], dtype=dtype)
+
+
+def _metadata_dict(metadata: WaveformMetadata) -> dict:
+    """
+    Converts a `WaveformMetadata` object to a dictionary.
+    """
+    return {field: getattr(metadata, field) for field in METADATA_FIELDS}
+
+
+def _metadata_from_dict(values: dict) -> WaveformMetadata:
+    """
+    Converts a dictionary to a `WaveformMetadata` object.
+    """
+    return WaveformMetadata(*(float(values[field]) for field in METADATA_FIELDS))
+
+
+def export_npz(source, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Exports waveforms to an uncompressed `.npz` archive.
+
+    `source` is either a `Waveforms` object or the path of a `.tek` file. Each
+    channel is stored as a 1-D array of raw samples named after the channel, and
+    is streamed into the archive `chunk_size` samples at a time. Metadata is
+    stored as a structured array under `__metadata__`.
+
+    Members are stored uncompressed, so `import_npz` can memory-map them.
+    """
+    waveforms = _waveforms(source).all()
+    channel_len = max([len(waveform.channel) for waveform in waveforms] + [1])
+    metadata = np.array(
+        [
+            (waveform.channel,)
+            + tuple(getattr(waveform.metadata, f) for f in METADATA_FIELDS)
+            for waveform in waveforms
+        ],
+        dtype=[("channel", f"U{channel_len}")] + [(f, "<f8") for f in METADATA_FIELDS],
+    )
+
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED) as archive:
+        for waveform in waveforms:
+            header = {
+                "descr": np.lib.format.dtype_to_descr(_raw_dtype(waveform.raw_data)),
+                "fortran_order": False,
+                "shape": (len(waveform.raw_data),),
+            }
+            with archive.open(
+                f"{waveform.channel}.npy", "w", force_zip64=True
+            ) as member:
+                np.lib.format.write_array_header_2_0(member, header)
+                for chunk in _chunks(waveform.raw_data, chunk_size):
+                    member.write(chunk.tobytes())
+        with archive.open(f"{METADATA_KEY}.npy", "w") as member:
+            np.lib.format.write_array(member, metadata)
+
+
+def _member_offset(file, info: zipfile.ZipInfo) -> int:
+    """
+    Returns the file offset of the data of an uncompressed archive member.
+    """
+    file.seek(info.header_offset)
+    local_header = file.read(30)
+    name_len, extra_len = struct.unpack("<HH", local_header[26:30])
+    return info.header_offset + 30 + name_len + extra_len
+
+
+def import_npz(path: str, mmap: bool = True) -> Waveforms:
+    """
+    Imports waveforms from a `.npz` archive written by `export_npz`.
+
+    If `mmap` is set, the raw data of each waveform is a read-only `numpy.memmap`
+    into the archive. Otherwise, it is read into memory.
+    """
+    waveforms = []
+    with zipfile.ZipFile(path, "r") as archive, open(path, "rb") as file:
+        with archive.open(f"{METADATA_KEY}.npy") as member:
+            metadata = np.asarray(np.lib.format.read_array(member))
+        for row in metadata:
+            channel = str(row["channel"])
+            info = archive.getinfo(f"{channel}.npy")
+            if mmap and info.compress_type == zipfile.ZIP_STORED:
+                file.seek(_member_offset(file, info))
+                if np.lib.format.read_magic(file) == (1, 0):
+                    shape, _, dtype = np.lib.format.read_array_header_1_0(file)
+                else:
+                    shape, _, dtype = np.lib.format.read_array_header_2_0(file)
+                raw_data = (
+                    np.memmap(
+                        path, dtype=dtype, mode="r", offset=file.tell(), shape=shape
+                    )
+                    if shape[0] > 0
+                    else np.zeros(shape, dtype=dtype)
+                )
+            else:
+                with archive.open(info) as member:
+                    raw_data = np.lib.format.read_array(member)
+            metadata_values = {field: row[field] for field in METADATA_FIELDS}
+            waveforms.append(
+                Waveform(channel, _metadata_from_dict(metadata_values), raw_data)
+            )
+
+    return Waveforms(waveforms)
+
+
+def export_hdf5(source, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Exports waveforms to a chunked HDF5 file. Requires `h5py`.
+
+    `source` is either a `Waveforms` object or the path of a `.tek` file. Each
+    channel is stored as a chunked 1-D dataset of raw samples, with the channel
+    and metadata stored as dataset attributes. Dataset names are the
+    percent-encoded channel, since a "/" (as in bundled channels such as
+    "A/CH1") would otherwise create a group.
+    """
+    h5py = _require("h5py")
+    with h5py.File(path, "w") as file:
+        for waveform in _waveforms(source).all():
+            length = len(waveform.raw_data)
+            dataset = file.create_dataset(
+                quote(waveform.channel, safe=""),
+                shape=(length,),
+                dtype=_raw_dtype(waveform.raw_data),
+                chunks=(max(1, min(chunk_size, length)),),
+            )
+            dataset.attrs.update(_metadata_dict(waveform.metadata))
+            dataset.attrs[CHANNEL_KEY] = waveform.channel
+            start = 0
+            for chunk in _chunks(waveform.raw_data, chunk_size):
+                dataset[start : start + len(chunk)] = chunk
+                start += len(chunk)
+
+
+def import_hdf5(path: str) -> Waveforms:
+    """
+    Imports waveforms from an HDF5 file written by `export_hdf5`. Requires `h5py`.
+    """
+    h5py = _require("h5py")
+    waveforms = []
+    with h5py.File(path, "r") as file:
+        for name, dataset in file.items():
+            channel = dataset.attrs.get(CHANNEL_KEY, unquote(name))
+            waveforms.append(
+                Waveform(str(channel), _metadata_from_dict(dataset.attrs), dataset[()])
+            )
+
+    return Waveforms(waveforms)
+
+
+def export_parquet(source, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Exports waveforms to a Parquet file. Requires `pyarrow`.
+
+    `source` is either a `Waveforms` object or the path of a `.tek` file. Samples
+    are stored in long format with `channel` and `raw` columns, one row group per
+    chunk of `chunk_size` samples. The `raw` column has the widest dtype of all
+    channels in native byte order, and the dtype of each channel is stored with
+    its metadata as JSON in the schema metadata.
+    """
+    pa = _require("pyarrow")
+    pq = _require("pyarrow.parquet")
+    waveforms = _waveforms(source).all()
+    dtypes = [_raw_dtype(wf.raw_data).newbyteorder("=") for wf in waveforms]
+    raw_dtype = np.result_type(*dtypes) if dtypes else np.dtype(np.int8)
+    raw_type = pa.from_numpy_dtype(raw_dtype)
+    schema = pa.schema(
+        [("channel", pa.dictionary(pa.int8(), pa.string())), ("raw", raw_type)],
+        metadata={
+            METADATA_KEY: json.dumps(
+                [
+                    {
+                        "channel": waveform.channel,
+                        "dtype": dtype.str,
+                        **_metadata_dict(waveform.metadata),
+                    }
+                    for waveform, dtype in zip(waveforms, dtypes)
+                ]
+            )
+        },
+    )
+
+    with pq.ParquetWriter(path, schema) as writer:
+        for waveform in waveforms:
+            for chunk in _chunks(waveform.raw_data, chunk_size):
+                channel = pa.DictionaryArray.from_arrays(
+                    pa.array(np.zeros(len(chunk), dtype=np.int8)),
+                    pa.array([waveform.channel]),
+                )
+                raw = pa.array(chunk.astype(raw_dtype, copy=False), type=raw_type)
+                writer.write_table(pa.table([channel, raw], schema=schema))
+
+
+def import_parquet(path: str) -> Waveforms:
+    """
+    Imports waveforms from a Parquet file written by `export_parquet`. Requires `pyarrow`.
+    """
+    pc = _require("pyarrow.compute")
+    pq = _require("pyarrow.parquet")
+    table = pq.read_table(path)
+    metadata = json.loads(table.schema.metadata[METADATA_KEY.encode("utf-8")])
+    channels = table.column("channel").cast("string")
+
+    waveforms = []
+    for values in metadata:
+        mask = pc.equal(channels, values["channel"])
+        raw_data = table.column("raw").filter(mask).to_numpy()
+        if "dtype" in values:
+            raw_data = raw_data.astype(values["dtype"], copy=False)
+        waveforms.append(
+            Waveform(values["channel"], _metadata_from_dict(values), raw_data)
+        )
+
+    return Waveforms(waveforms)
+
+
+EXPORTERS = {
+    ".npz": export_npz,
+    ".h5": export_hdf5,
+    ".hdf5": export_hdf5,
+    ".parquet": export_parquet,
+}
+
+IMPORTERS = {
+    ".npz": import_npz,
+    ".h5": import_hdf5,
+    ".hdf5": import_hdf5,
+    ".parquet": import_parquet,
+}
+
+
+def _extension(path: str) -> str:
+    """
+    Returns the lowercase extension of a path.
+    """
+    dot = path.rfind(".")
+    return path[dot:].lower() if dot >= 0 else ""
+
+
+def export_waveforms(source, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Exports waveforms to the provided path, choosing the format by file extension.
+    """
+    extension = _extension(path)
+    if extension not in EXPORTERS:
+        raise ValueError(f"unsupported export format {extension!r}")
+    EXPORTERS[extension](source, path, chunk_size)
+
+
+def import_waveforms(path: str) -> Waveforms:
+    """
+    Imports waveforms from the provided path, choosing the format by file extension.
+    """
+    extension = _extension(path)
+    if extension not in IMPORTERS:
+        raise ValueError(f"unsupported import format {extension!r}")
+    return IMPORTERS[extension](path)
@@ -6,9 +6,10 @@ import socket
 from .raw import send_command, query_ascii, horizontal_recordlength_query
 
 
-def record_length(soc: socket.socket) -> int:
+def record_length(soc: socket.socket, timeout: float = None) -> int:
     """
-    Retrieves the horizontal record length from the oscilloscope.
+    Retrieves the horizontal record length from the oscilloscope, raising
+    `socket.timeout` if it does not arrive within `timeout` seconds.
     """
     send_command(soc, horizontal_recordlength_query())
-    return int(query_ascii(soc))
+    return int(query_ascii(soc, timeout))
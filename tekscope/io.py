@@ -4,37 +4,73 @@ Utilities for saving oscilloscope data to disk.
 
 import struct
 
+import numpy as np
+
 from .waveform import WaveformMetadata, Waveform, Waveforms
+from .profiler import stage
 
 
-def write_waveform(file, waveform: Waveform):
+def write_waveform_header(
+    file, channel: str, metadata: WaveformMetadata, raw_data_len: int
+):
     """
-    Save a single waveform to an IO stream.
+    Save the header of a single waveform to an IO stream.
+
+    Exactly `raw_data_len` bytes of 8-bit signed raw data must be written next.
     """
-    channel_bytes = waveform.channel.encode("utf-8")
+    channel_bytes = channel.encode("utf-8")
     channel_len = struct.pack("<B", len(channel_bytes))
     channel = struct.pack(f"<{len(channel_bytes)}B", *channel_bytes)
-    t_incr = struct.pack("<d", waveform.metadata.t_incr)
-    t_zero = struct.pack("<d", waveform.metadata.t_zero)
-    v_mult = struct.pack("<d", waveform.metadata.v_mult)
-    v_off = struct.pack("<d", waveform.metadata.v_off)
-    v_zero = struct.pack("<d", waveform.metadata.v_zero)
-    raw_data_len = struct.pack("<Q", len(waveform.raw_data))
-    raw_data = struct.pack(f"<{len(waveform.raw_data)}b", *waveform.raw_data)
+    t_incr = struct.pack("<d", metadata.t_incr)
+    t_zero = struct.pack("<d", metadata.t_zero)
+    v_mult = struct.pack("<d", metadata.v_mult)
+    v_off = struct.pack("<d", metadata.v_off)
+    v_zero = struct.pack("<d", metadata.v_zero)
+    raw_data_len = struct.pack("<Q", raw_data_len)
 
     file.write(
-        channel_len
-        + channel
-        + t_incr
-        + t_zero
-        + v_mult
-        + v_off
-        + v_zero
-        + raw_data_len
-        + raw_data
+        channel_len + channel + t_incr + t_zero + v_mult + v_off + v_zero + raw_data_len
     )
 
 
+def as_tek_raw_data(raw_data) -> np.ndarray:
+    """
+    Returns raw data as the contiguous 8-bit samples stored in `.tek` files.
+
+    Raises `ValueError` if the samples are not integers or do not fit in 8 bits,
+    e.g. because they were transferred 2 bytes wide.
+
+    >>> as_tek_raw_data([1, -2, 3]).tolist()
+    [1, -2, 3]
+    """
+    samples = np.asarray(raw_data)
+    if samples.dtype == np.int8 or samples.size == 0:
+        return np.ascontiguousarray(samples, dtype=np.int8)
+    if not np.issubdtype(samples.dtype, np.integer):
+        raise ValueError(f".tek files hold integer samples, not {samples.dtype}")
+    if samples.min() < -128 or samples.max() > 127:
+        raise ValueError(
+            ".tek files hold 8-bit samples, but the raw data ranges from "
+            f"{samples.min()} to {samples.max()}"
+        )
+    return samples.astype(np.int8)
+
+
+def write_waveform(file, waveform: Waveform):
+    """
+    Save a single waveform to an IO stream.
+
+    8-bit raw data held in a NumPy array is written directly from its buffer.
+    Raises `ValueError` if the raw data does not fit in 8 bits, see
+    `as_tek_raw_data`.
+    """
+    with stage("save") as save:
+        raw_data = as_tek_raw_data(waveform.raw_data)
+        write_waveform_header(file, waveform.channel, waveform.metadata, len(raw_data))
+        file.write(raw_data.data)
+        save.num_bytes = len(raw_data)
+
+
 def save_waveform(waveform: Waveform, path: str):
     """
     Save a single waveform to the provided path.
@@ -59,9 +95,12 @@ def save_waveforms(waveforms: Waveforms, path: str):
         write_waveforms(file, waveforms)
 
 
-def read_waveform(file) -> Waveform:
+def read_waveform_header(file) -> (str, WaveformMetadata, int):
     """
-    Loads first waveform in file.
+    Reads the header of the next waveform in the stream, leaving the stream
+    positioned at the start of its raw data.
+
+    Returns a `(channel, metadata, raw_data_len)` tuple, or `None` at the end of the stream.
     """
     channel_len_packed = file.read(struct.calcsize("<B"))
     if channel_len_packed == b"":
@@ -78,14 +117,28 @@ def read_waveform(file) -> Waveform:
     v_zero = struct.unpack("<d", file.read(struct.calcsize("<d")))[0]
     raw_data_len = struct.unpack("<Q", file.read(struct.calcsize("<Q")))[0]
 
+    return (
+        channel,
+        WaveformMetadata(t_incr, t_zero, v_mult, v_off, v_zero),
+        raw_data_len,
+    )
+
+
+def read_waveform(file) -> Waveform:
+    """
+    Loads first waveform in file.
+    """
+    header = read_waveform_header(file)
+    if header is None:
+        return None
+    channel, metadata, raw_data_len = header
+
     raw_data_fmt = f"<{raw_data_len}b"
     raw_data = list(
         map(int, struct.unpack(raw_data_fmt, file.read(struct.calcsize(raw_data_fmt))))
     )
 
-    return Waveform(
-        channel, WaveformMetadata(t_incr, t_zero, v_mult, v_off, v_zero), raw_data
-    )
+    return Waveform(channel, metadata, raw_data)
 
 
 def load_waveform(path: str) -> Waveform:
@@ -112,6 +165,57 @@ def read_waveforms(file) -> Waveforms:
 def load_waveforms(path: str) -> Waveforms:
     """
     Load multiple waveforms from from the provided path
+
+    See `memmap_waveforms` for loading without reading or decoding the raw data.
     """
     with open(path, "rb") as file:
         return read_waveforms(file)
+
+
+def scan_waveform_headers(path: str) -> [(str, WaveformMetadata, int, int)]:
+    """
+    Reads the headers of all waveforms in the provided path, skipping over their
+    raw data.
+
+    Returns a list of `(channel, metadata, offset, raw_data_len)` tuples, where
+    `offset` is the file offset of the raw data.
+    """
+    headers = []
+    with open(path, "rb") as file:
+        header = read_waveform_header(file)
+        while header is not None:
+            channel, metadata, raw_data_len = header
+            offset = file.tell()
+            headers.append((channel, metadata, offset, raw_data_len))
+            file.seek(offset + raw_data_len)
+            header = read_waveform_header(file)
+
+    return headers
+
+
+def memmap_raw_data(path: str, offset: int, raw_data_len: int) -> np.ndarray:
+    """
+    Memory-maps `raw_data_len` samples of raw data starting at `offset` in the
+    provided path as a read-only `numpy.memmap`.
+    """
+    if raw_data_len == 0:
+        return np.zeros(0, dtype=np.int8)
+    return np.memmap(
+        path, dtype=np.int8, mode="r", offset=offset, shape=(raw_data_len,)
+    )
+
+
+def memmap_waveforms(path: str) -> Waveforms:
+    """
+    Memory-maps multiple waveforms from the provided path.
+
+    Only the headers are read eagerly. The raw data of each returned waveform is a
+    read-only `numpy.memmap` backed by the file, so samples are paged in on access.
+    """
+    waveforms = []
+    for channel, metadata, offset, raw_data_len in scan_waveform_headers(path):
+        waveforms.append(
+            Waveform(channel, metadata, memmap_raw_data(path, offset, raw_data_len))
+        )
+
+    return Waveforms(waveforms)
@@ -0,0 +1,253 @@
+"""
+Utilities for streaming a decimated live view of waveforms from the oscilloscope.
+"""
+
+import time
+import socket
+import threading
+from collections import deque
+
+import numpy as np
+
+from .profiler import stage, bind
+from .transfer import (
+    set_data_start,
+    set_data_stop,
+    set_default_waveform_settings,
+    retrieve_waveform_with_default_settings,
+)
+from .waveform import Waveform
+
+
+def minmax_bins(samples: np.ndarray, bins: int) -> (np.ndarray, np.ndarray):
+    """
+    Splits the samples into `bins` bins of equal size and returns the minimum and
+    maximum of each bin, so that peaks survive decimation.
+
+    Trailing samples that do not fill a whole bin are dropped. If there are fewer
+    than two samples per bin, the samples are returned as both minimum and maximum.
+
+    >>> low, high = minmax_bins(np.array([0, 3, 1, 2, 5, 4, 9]), 3)
+    >>> low.tolist(), high.tolist()
+    ([0, 1, 4], [3, 2, 5])
+    """
+    samples = np.asarray(samples)
+    per_bin = len(samples) // bins if bins > 0 else 0
+    if per_bin < 2:
+        return samples, samples
+    binned = samples[: per_bin * bins].reshape(bins, per_bin)
+    return binned.min(axis=1), binned.max(axis=1)
+
+
+# pylint: disable-next=too-few-public-methods
+class LiveFrame:
+    """
+    Class for storing the min/max decimated view of one waveform.
+    """
+
+    __slots__ = ("channel", "time", "low", "high")
+
+    def __init__(
+        self, channel: str, time_: np.ndarray, low: np.ndarray, high: np.ndarray
+    ):
+        """
+        Initializes a `LiveFrame` object.
+
+        `channel`: The channel of the waveform.
+        `time_`: The timestamp of the start of each bin.
+        `low`: The minimum voltage within each bin.
+        `high`: The maximum voltage within each bin.
+        """
+        self.channel = channel
+        self.time = time_
+        self.low = low
+        self.high = high
+
+    @staticmethod
+    def from_waveform(waveform: Waveform, bins: int) -> "LiveFrame":
+        """
+        Decimates a waveform into `bins` min/max bins.
+        """
+        metadata = waveform.metadata
+        low, high = minmax_bins(waveform.raw_data, bins)
+        step = len(waveform.raw_data) // len(low) if len(low) > 0 else 1
+        return LiveFrame(
+            waveform.channel,
+            metadata.t_zero + metadata.t_incr * step * np.arange(len(low)),
+            metadata.v_mult * (low - metadata.v_off) + metadata.v_zero,
+            metadata.v_mult * (high - metadata.v_off) + metadata.v_zero,
+        )
+
+    def polyline(self) -> (np.ndarray, np.ndarray):
+        """
+        Returns the points of a single line that zig-zags between the minimum and
+        maximum of each bin.
+        """
+        return np.repeat(self.time, 2), np.column_stack((self.low, self.high)).ravel()
+
+
+class FrameRate:
+    """
+    Class for measuring a frame rate over a sliding window of recent frames.
+    """
+
+    def __init__(self, window: int = 30):
+        """
+        Initializes a `FrameRate` object.
+
+        `window`: The number of most recent frames to average over.
+        """
+        self.times = deque(maxlen=window + 1)
+
+    def tick(self, now: float = None):
+        """
+        Records a frame at time `now`, defaulting to the current time.
+        """
+        self.times.append(time.perf_counter() if now is None else now)
+
+    def rate(self) -> float:
+        """
+        Returns the average number of frames per second over the window.
+        """
+        if len(self.times) < 2 or self.times[-1] == self.times[0]:
+            return 0.0
+        return (len(self.times) - 1) / (self.times[-1] - self.times[0])
+
+
+# pylint: disable-next=too-many-instance-attributes
+class LiveFeed:
+    """
+    Class for continuously retrieving decimated views of waveforms in a background
+    thread, so that a UI never blocks on the socket.
+
+    Only the most recent set of frames is kept.
+    """
+
+    # pylint: disable-next=too-many-arguments,too-many-positional-arguments
+    def __init__(
+        self,
+        soc: socket.socket,
+        sources: [str],
+        bins: int = 1000,
+        start: int = 1,
+        stop: int = None,
+        timeout: float = None,
+        interval: float = 0.0,
+    ):
+        """
+        Initializes a `LiveFeed` object.
+
+        `sources`: The sources to retrieve.
+        `bins`: The number of min/max bins to decimate each waveform into.
+        `start`, `stop`: The 1-indexed range of points to transfer, selected with
+            DATA:START and DATA:STOP. Narrowing it reduces the transfer size.
+            `stop` defaults to the whole record.
+        `timeout`: Bound (in seconds) on each curve transfer.
+        `interval`: Minimum time (in seconds) between the starts of consecutive
+            retrievals, e.g. to match the frame rate of a display.
+        """
+        self.soc = soc
+        self.sources = sources
+        self.bins = bins
+        self.start = start
+        self.stop = stop
+        self.timeout = timeout
+        self.interval = interval
+        self.lock = threading.Condition()
+        self.frames = None
+        self.sequence = 0
+        self.error = None
+        self.rate = FrameRate()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def __enter__(self):
+        self.run()
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def run(self):
+        """
+        Starts retrieving frames in a background thread, whose stages are
+        recorded by the profiler active now, if any.
+        """
+        self.stopped.clear()
+        self.thread = threading.Thread(target=bind(self._loop), daemon=True)
+        self.thread.start()
+
+    def close(self):
+        """
+        Stops retrieving frames and waits for the background thread to finish.
+        """
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def retrieve(self) -> {str: LiveFrame}:
+        """
+        Retrieves and decimates one frame of every source. Disabled sources are skipped.
+
+        Curves are transferred in the data format of the connection, see
+        `transfer.get_data_format`.
+        """
+        frames = {}
+        for source in self.sources:
+            waveform = retrieve_waveform_with_default_settings(
+                self.soc, source, self.timeout, progress=False
+            )
+            if waveform is None:
+                continue
+            with stage("construct"):
+                frames[source] = LiveFrame.from_waveform(waveform, self.bins)
+        return frames
+
+    def _loop(self):
+        """
+        Retrieves frames until stopped, publishing each as the latest.
+        """
+        try:
+            set_default_waveform_settings(self.soc)
+            set_data_start(self.soc, self.start)
+            if self.stop is not None:
+                set_data_stop(self.soc, self.stop)
+            while not self.stopped.is_set():
+                started = time.perf_counter()
+                frames = self.retrieve()
+                with self.lock:
+                    self.frames = frames
+                    self.sequence += 1
+                    self.rate.tick()
+                    self.lock.notify_all()
+                self.stopped.wait(started + self.interval - time.perf_counter())
+        # pylint: disable-next=broad-exception-caught
+        except Exception as err:
+            with self.lock:
+                self.error = err
+                self.lock.notify_all()
+
+    def latest(self) -> (int, {str: LiveFrame}):
+        """
+        Returns the sequence number and frames of the most recent retrieval without
+        blocking. The sequence number is 0 until the first frames arrive.
+
+        Errors raised in the background thread are re-raised here.
+        """
+        with self.lock:
+            if self.error is not None:
+                raise self.error
+            return self.sequence, self.frames
+
+    def wait(self, sequence: int = 0, timeout: float = None) -> (int, {str: LiveFrame}):
+        """
+        Blocks until frames newer than `sequence` arrive, then returns them as in
+        `latest`. Raises `TimeoutError` if none arrive within `timeout` seconds.
+        """
+        with self.lock:
+            if not self.lock.wait_for(
+                lambda: self.sequence > sequence or self.error is not None, timeout
+            ):
+                raise TimeoutError(f"no frames within {timeout}s")
+        return self.latest()
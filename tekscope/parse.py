@@ -2,6 +2,10 @@
 Utilities for parsing raw bytes received from the oscilloscope.
 """
 
+import csv
+import functools
+import numpy as np
+
 from .waveform import WaveformMetadata
 
 
@@ -19,6 +23,24 @@ def parse_ribinary_seq(data: bytes, bytes_nr: int) -> [int]:
     ]
 
 
+def parse_ascii_curve(data: bytes) -> np.ndarray:
+    """
+    Converts an ASCII sequence received from the oscilloscope to a NumPy array.
+
+    Values are parsed in bulk by NumPy rather than one `int()` call at a time.
+
+    >>> parse_ascii_curve(b"1,-2,127\\n").tolist()
+    [1, -2, 127]
+    """
+    data = bytes(data).strip()
+    if data == b"":
+        return np.zeros(0, dtype=np.int64)
+    values = np.fromstring(data, dtype=np.int64, sep=",")
+    if len(values) != data.count(b",") + 1:
+        raise ValueError("malformed ASCII curve")
+    return values
+
+
 def parse_ascii_seq(data: bytes) -> [int]:
     """
     Convert a ASCII sequence received from the oscilloscope to a Python list.
@@ -26,7 +48,186 @@ def parse_ascii_seq(data: bytes) -> [int]:
     >>> parse_ascii_seq(b"1,2")
     [1, 2]
     """
-    return list(map(int, data.split(b",")))
+    return parse_ascii_curve(data).tolist()
+
+
+class AsciiDecoder:
+    """
+    Class for incrementally decoding an ASCII sequence received in arbitrary chunks.
+    """
+
+    def __init__(self):
+        """
+        Initializes an `AsciiDecoder` object.
+
+        `num_bytes` counts the bytes fed to the decoder.
+        """
+        self.tail = b""
+        self.num_bytes = 0
+
+    def feed(self, chunk: bytes) -> np.ndarray:
+        """
+        Decodes every value completed by `chunk`.
+
+        The trailing, possibly incomplete value is held back until the next call.
+
+        >>> decoder = AsciiDecoder()
+        >>> decoder.feed(b"1,-2").tolist(), decoder.feed(b"3,4").tolist()
+        ([1], [-23])
+        >>> decoder.finish().tolist()
+        [4]
+        """
+        self.num_bytes += len(chunk)
+        data = self.tail + bytes(chunk)
+        split = data.rfind(b",")
+        if split < 0:
+            self.tail = data
+            return np.zeros(0, dtype=np.int64)
+        self.tail = data[split + 1 :]
+        return parse_ascii_curve(data[:split])
+
+    def finish(self) -> np.ndarray:
+        """
+        Decodes the final value.
+        """
+        values = parse_ascii_curve(self.tail)
+        self.tail = b""
+        return values
+
+
+def _preamble_field(values: [str], index: int, kind):
+    """
+    Converts field `index` of a WFMOUTPRE? response with `kind`, returning `None`
+    if the field is missing or empty.
+    """
+    value = values[index].strip() if index < len(values) else ""
+    return kind(value) if value != "" else None
+
+
+# pylint: disable-next=too-few-public-methods,too-many-instance-attributes
+class Preamble:
+    """
+    Class for storing the full output of the WFMOUTPRE? query.
+    """
+
+    REQUIRED_FIELDS = 17
+
+    __slots__ = (
+        "byt_nr",
+        "bit_nr",
+        "encdg",
+        "bn_fmt",
+        "byt_or",
+        "wfid",
+        "nr_pt",
+        "pt_fmt",
+        "pt_order",
+        "xunit",
+        "xincr",
+        "xzero",
+        "pt_off",
+        "yunit",
+        "ymult",
+        "yoff",
+        "yzero",
+        "domain",
+        "wfmtype",
+        "centerfreq",
+        "span",
+        "reflevel",
+    )
+
+    def __init__(self, values: [str]):
+        """
+        Initializes a `Preamble` object from the fields of a WFMOUTPRE? response,
+        in the order BYT_NR, BIT_NR, ENCDG, BN_FMT, BYT_OR, WFID, NR_PT, PT_FMT,
+        PT_ORDER, XUNIT, XINCR, XZERO, PT_OFF, YUNIT, YMULT, YOFF, YZERO, DOMAIN,
+        WFMTYPE, CENTERFREQ, SPAN and REFLEVEL.
+
+        Trailing fields that the oscilloscope did not report are set to `None`.
+        """
+        self.byt_nr = _preamble_field(values, 0, int)
+        self.bit_nr = _preamble_field(values, 1, int)
+        self.encdg = _preamble_field(values, 2, str)
+        self.bn_fmt = _preamble_field(values, 3, str)
+        self.byt_or = _preamble_field(values, 4, str)
+        self.wfid = _preamble_field(values, 5, str)
+        self.nr_pt = _preamble_field(values, 6, int)
+        self.pt_fmt = _preamble_field(values, 7, str)
+        self.pt_order = _preamble_field(values, 8, str)
+        self.xunit = _preamble_field(values, 9, str)
+        self.xincr = _preamble_field(values, 10, float)
+        self.xzero = _preamble_field(values, 11, float)
+        self.pt_off = _preamble_field(values, 12, int)
+        self.yunit = _preamble_field(values, 13, str)
+        self.ymult = _preamble_field(values, 14, float)
+        self.yoff = _preamble_field(values, 15, float)
+        self.yzero = _preamble_field(values, 16, float)
+        self.domain = _preamble_field(values, 17, str)
+        self.wfmtype = _preamble_field(values, 18, str)
+        self.centerfreq = _preamble_field(values, 19, float)
+        self.span = _preamble_field(values, 20, float)
+        self.reflevel = _preamble_field(values, 21, float)
+
+    def metadata(self) -> WaveformMetadata:
+        """
+        Returns the `WaveformMetadata` described by this preamble.
+        """
+        return WaveformMetadata(
+            self.xincr, self.xzero, self.ymult, self.yoff, self.yzero
+        )
+
+    def num_bytes(self) -> int:
+        """
+        Returns the number of bytes in the binary curve described by this preamble.
+        """
+        return self.nr_pt * self.byt_nr
+
+    def dtype(self) -> np.dtype:
+        """
+        Returns the NumPy dtype of a binary curve described by this preamble.
+        """
+        kind = {"RI": "i", "RP": "u", "FP": "f"}[self.bn_fmt]
+        order = "<" if self.byt_or == "LSB" else ">"
+        return np.dtype(f"{order}{kind}{self.byt_nr}")
+
+
+@functools.lru_cache(maxsize=64)
+def parse_preamble(data: bytes) -> Preamble:
+    """
+    Parses the output of the WFMOUTPRE? query to a `Preamble` object.
+
+    Returns `None` if the response does not describe a waveform (e.g. because the
+    source channel is disabled). Results are cached per response, so repeated
+    queries with unchanged settings are only parsed once; the returned object
+    must therefore not be modified.
+
+    >>> preamble = parse_preamble(b'1;8;BINARY;RI;MSB;"Ch1, DC coupling";10000;Y;LINEAR;\
+    ... "s";400.0000E-12;-20.0000E-6;0;"V";4.0000E-3;0.0E+0;0.0E+0;TIME;ANALOG')
+    >>> preamble.byt_nr, preamble.bn_fmt, preamble.nr_pt, preamble.yunit
+    (1, 'RI', 10000, 'V')
+    >>> preamble.dtype()
+    dtype('int8')
+    """
+    values = next(csv.reader([data.decode("utf-8").strip()], delimiter=";"))
+    if len(values) < Preamble.REQUIRED_FIELDS:
+        return None
+    return Preamble(values)
+
+
+def parse_curve(data: bytes, preamble: Preamble) -> np.ndarray:
+    """
+    Decodes a curve described by `preamble` to a NumPy array.
+
+    Binary curves are decoded without copying. ASCII curves use `parse_ascii_curve`.
+
+    >>> preamble = parse_preamble(b'2;16;BINARY;RI;MSB;"";2;Y;LINEAR;"s";1;0;0;"V";1;0;0')
+    >>> parse_curve(bytes([0x7, 0x5, 0xf8, 0xc1]), preamble).tolist()
+    [1797, -1855]
+    """
+    if preamble.encdg == "ASCII":
+        return parse_ascii_curve(data)
+    return np.frombuffer(data, dtype=preamble.dtype())
 
 
 def parse_wfmoutpre(data: bytes) -> WaveformMetadata:
@@ -48,13 +249,7 @@ def parse_wfmoutpre(data: bytes) -> WaveformMetadata:
     >>> int(metadata.v_zero)
     0
     """
-    data = data.split(b";")
-    if len(data) < 17:
+    preamble = parse_preamble(data)
+    if preamble is None:
         return None
-    return WaveformMetadata(
-        float(data[10]),
-        float(data[11]),
-        float(data[14]),
-        float(data[15]),
-        float(data[16]),
-    )
+    return preamble.metadata()
@@ -0,0 +1,326 @@
+"""
+Utilities for profiling the stages of an oscilloscope session.
+
+Library code marks its stages with `stage`, which does nothing unless a
+`SessionProfiler` is active in the current context. Each `Oscilloscope` with
+profiling enabled activates its own profiler around its calls, so several
+sessions can be profiled at once. The stages are:
+
+- `transfer`: Querying the oscilloscope and receiving curves (`raw`). Passthrough
+  saves stream received curves straight to disk, so their saving is included here.
+- `parse`: Decoding received curves and preambles (`parse`).
+- `construct`: Building `Waveform` and `Waveforms` objects (`waveform`).
+- `save`: Writing waveforms to `.tek` files (`io`).
+"""
+
+import sys
+import time
+import threading
+import functools
+import contextlib
+import contextvars
+import tracemalloc
+
+STAGES = ("transfer", "parse", "construct", "save")
+
+_current = contextvars.ContextVar("tekscope_profiler", default=None)
+_local = threading.local()
+
+
+# pylint: disable-next=too-few-public-methods,too-many-instance-attributes
+class StageStats:
+    """
+    Class for accumulating the cost of every call of one stage.
+    """
+
+    def __init__(self, name: str):
+        """
+        Initializes a `StageStats` object.
+
+        `calls`: The number of times the stage ran.
+        `wall`: Total elapsed time in seconds.
+        `cpu`: Total CPU time of the running threads in seconds.
+        `num_bytes`: Total bytes moved, as reported by the stage.
+        `peak`: Largest traced memory allocated above the start of any call, in bytes.
+        `blocks`: Net number of memory blocks allocated by the Python allocator,
+            which approximates the number of Python objects left allocated.
+        """
+        self.name = name
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.num_bytes = 0
+        self.peak = 0
+        self.blocks = 0
+
+
+# pylint: disable-next=too-few-public-methods
+class _NullStage:
+    """
+    Stage used when no profiler is active.
+    """
+
+    num_bytes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+NULL_STAGE = _NullStage()
+
+
+# pylint: disable-next=too-many-instance-attributes
+class _Stage:
+    """
+    Measures one call of a stage. Set `num_bytes` inside the `with` block to
+    record the bytes it moved.
+    """
+
+    def __init__(self, profiler, name: str):
+        self.profiler = profiler
+        self.name = name
+        self.num_bytes = 0
+        self.child_peak = 0
+        self.start = None
+
+    def __enter__(self):
+        stack = _stack()
+        stack.append(self)
+        self.start = (
+            time.perf_counter(),
+            time.thread_time(),
+            sys.getallocatedblocks(),
+            self._trace(),
+        )
+        return self
+
+    def _trace(self) -> int:
+        """
+        Returns the currently traced memory and starts a new peak measurement.
+        """
+        if not tracemalloc.is_tracing():
+            return 0
+        current, peak = tracemalloc.get_traced_memory()
+        parent = _stack()[-2] if len(_stack()) > 1 else None
+        if parent is not None:
+            parent.child_peak = max(parent.child_peak, peak)
+        tracemalloc.reset_peak()
+        return current
+
+    def __exit__(self, *args):
+        wall, cpu, blocks, traced = self.start
+        peak = 0
+        if tracemalloc.is_tracing():
+            absolute = max(tracemalloc.get_traced_memory()[1], self.child_peak)
+            peak = absolute - traced
+        _stack().pop()
+        parent = _stack()[-1] if _stack() else None
+        if parent is not None:
+            parent.child_peak = max(parent.child_peak, traced + peak)
+        self.profiler.record(
+            self.name,
+            time.perf_counter() - wall,
+            time.thread_time() - cpu,
+            self.num_bytes,
+            peak,
+            sys.getallocatedblocks() - blocks,
+        )
+
+
+class _MemoryTracing:
+    """
+    Shares `tracemalloc` between profilers, starting it for the first profiler
+    that traces memory and stopping it after the last one, unless it was
+    already running.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.users = set()
+        self.started = False
+
+    def acquire(self, user):
+        """
+        Starts tracing memory on behalf of `user`.
+        """
+        with self.lock:
+            if not self.users and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.started = True
+            self.users.add(user)
+
+    def release(self, user):
+        """
+        Stops tracing memory on behalf of `user`.
+        """
+        with self.lock:
+            if user not in self.users:
+                return
+            self.users.remove(user)
+            if not self.users and self.started:
+                tracemalloc.stop()
+                self.started = False
+
+
+_memory_tracing = _MemoryTracing()
+
+
+def _stack() -> list:
+    """
+    Returns the stack of stages running in the current thread.
+    """
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+class SessionProfiler:
+    """
+    Class for measuring the wall time, CPU time, bytes moved, peak memory and
+    allocations of each stage of an oscilloscope session.
+
+    Stages are recorded while the profiler is active in the current context,
+    see `activate`. Several profilers can run at once, and stages running
+    concurrently in several threads are all recorded, but their memory peaks
+    are approximate.
+    """
+
+    def __init__(self, trace_memory: bool = True):
+        """
+        Initializes a `SessionProfiler` object.
+
+        `trace_memory`: Whether to measure memory peaks with `tracemalloc`, which
+            slows down allocation-heavy code.
+        """
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self.samples = 0
+        self.lock = threading.Lock()
+        self.tokens = []
+
+    def __enter__(self):
+        self.start()
+        self.tokens.append(_current.set(self))
+        return self
+
+    def __exit__(self, *args):
+        _current.reset(self.tokens.pop())
+        self.stop()
+
+    def start(self):
+        """
+        Starts tracing memory for this profiler, if enabled.
+        """
+        if self.trace_memory:
+            _memory_tracing.acquire(self)
+
+    def stop(self):
+        """
+        Stops tracing memory for this profiler.
+        """
+        _memory_tracing.release(self)
+
+    @contextlib.contextmanager
+    def activate(self):
+        """
+        Returns a context manager within which stages run in the current
+        context are recorded by this profiler.
+        """
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+    # pylint: disable-next=too-many-arguments,too-many-positional-arguments
+    def record(
+        self, name: str, wall: float, cpu: float, num_bytes: int, peak: int, blocks: int
+    ):
+        """
+        Adds one call of a stage to the statistics.
+        """
+        with self.lock:
+            stats = self.stages.setdefault(name, StageStats(name))
+            stats.calls += 1
+            stats.wall += wall
+            stats.cpu += cpu
+            stats.num_bytes += num_bytes
+            stats.peak = max(stats.peak, peak)
+            stats.blocks += blocks
+
+    def add_samples(self, count: int):
+        """
+        Adds to the number of samples captured in this session.
+        """
+        with self.lock:
+            self.samples += count
+
+    def report(self) -> str:
+        """
+        Returns a table summarizing every stage, including the wall time per
+        captured megasample.
+        """
+        header = (
+            f"{'stage':<10}{'calls':>7}{'wall s':>10}{'cpu s':>10}{'MB':>10}"
+            f"{'MB/s':>10}{'peak MB':>10}{'blocks':>10}{'ms/MS':>10}"
+        )
+        lines = [header, "-" * len(header)]
+        order = sorted(
+            self.stages.values(),
+            key=lambda stats: (
+                STAGES.index(stats.name) if stats.name in STAGES else len(STAGES),
+                stats.name,
+            ),
+        )
+        megasamples = self.samples / 1e6
+        for stats in order:
+            rate = stats.num_bytes / 1e6 / stats.wall if stats.wall > 0 else 0.0
+            per_megasample = stats.wall * 1e3 / megasamples if megasamples else 0.0
+            lines.append(
+                f"{stats.name:<10}{stats.calls:>7}{stats.wall:>10.4f}"
+                f"{stats.cpu:>10.4f}{stats.num_bytes / 1e6:>10.3f}{rate:>10.2f}"
+                f"{stats.peak / 1e6:>10.3f}{stats.blocks:>10}{per_megasample:>10.3f}"
+            )
+        lines.append(f"{self.samples} samples captured")
+        return "\n".join(lines)
+
+
+def stage(name: str):
+    """
+    Returns a context manager measuring one call of the named stage with the
+    active profiler, or one that does nothing if no profiler is active.
+    """
+    profiler = _current.get()
+    if profiler is None:
+        return NULL_STAGE
+    return _Stage(profiler, name)
+
+
+def add_samples(count: int):
+    """
+    Adds to the number of captured samples of the active profiler, if any.
+    """
+    profiler = _current.get()
+    if profiler is not None:
+        profiler.add_samples(count)
+
+
+def bind(func):
+    """
+    Returns a function that calls `func` with the profiler that is active now,
+    so that stages it runs in other threads are recorded by that profiler.
+    """
+    profiler = _current.get()
+
+    @functools.wraps(func)
+    def bound(*args, **kwargs):
+        token = _current.set(profiler)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current.reset(token)
+
+    return bound
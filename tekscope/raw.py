@@ -3,6 +3,7 @@ Low-level functions for interacting with the oscilloscope's socket server.
 """
 
 import sys
+import time
 import socket
 
 
@@ -13,58 +14,266 @@ def send_command(soc: socket.socket, command: str):
     soc.sendall(f"{command}\n".encode("utf-8"))
 
 
-def recv_until(soc: socket.socket, end: bytes) -> bytes:
+class Connection:
+    """
+    Socket connection to the oscilloscope's socket server that can be
+    re-established after a failure.
+
+    Behaves like the underlying `socket.socket`, so it can be passed anywhere a
+    socket is expected.
+    """
+
+    def __init__(self, host: str, port: int, timeout: float = None):
+        """
+        Initializes a `Connection` object and connects to the oscilloscope.
+
+        `timeout`: Timeout (in seconds) for establishing the connection.
+
+        `data_format` holds the `(encoding, width)` that curves are transferred
+        in by default over this connection, e.g. as chosen by
+        `transfer.negotiate_data_format`.
+        """
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.data_format = (DataEncdg.BINARY, 1)
+        self.soc = None
+        self.reconnect()
+
+    def reconnect(self):
+        """
+        Closes the current socket, if any, and opens a new one with response
+        headers disabled. Nagle's algorithm is disabled so that short commands
+        and queries are not delayed.
+        """
+        if self.soc is not None:
+            self.soc.close()
+        self.soc = socket.create_connection((self.host, self.port), self.timeout)
+        self.soc.settimeout(None)
+        self.soc.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        send_command(self.soc, header_cmd(False))
+
+    def __getattr__(self, name):
+        return getattr(self.soc, name)
+
+
+class IncompleteTransferError(Exception):
+    """
+    Raised when the oscilloscope stops sending a binary block before it is complete.
+
+    `data` is a view of the portion of the block received so far, and `length`
+    is the full length of the block in bytes.
+    """
+
+    def __init__(self, data: memoryview, length: int, reason: str):
+        super().__init__(f"received {len(data)} of {length} bytes: {reason}")
+        self.data = data
+        self.length = length
+
+
+def _set_deadline(soc: socket.socket, deadline: float):
+    """
+    Sets the socket timeout to the time remaining until `deadline`.
+
+    A deadline of `None` leaves the socket timeout unchanged.
+    """
+    if deadline is None:
+        return
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise socket.timeout("deadline exceeded")
+    soc.settimeout(remaining)
+
+
+def _recv_byte(soc: socket.socket, deadline: float) -> bytes:
+    """
+    Receives a single byte.
+    """
+    _set_deadline(soc, deadline)
+    byte = soc.recv(1)
+    if byte == b"":
+        raise ConnectionError("connection closed by oscilloscope")
+    return byte
+
+
+def recv_until(soc: socket.socket, end: bytes, deadline: float = None) -> bytes:
     """
     Receives until the next occurrence of `end`.
 
-    Slow because it receives only one byte at a time.
+    Slow because it receives only one byte at a time. If provided, `deadline`
+    is a `time.monotonic()` timestamp after which `socket.timeout` is raised.
     """
     ret = b""
     while len(ret) < len(end) or ret[-len(end) :] != end:
-        ret += soc.recv(1)
+        ret += _recv_byte(soc, deadline)
     return ret
 
 
-def recv_length(soc: socket.socket, length: int) -> bytes:
+def recv_into_length(
+    soc: socket.socket, buffer, deadline: float = None, progress: bool = True
+) -> int:
     """
-    Receives the given number of bytes.
+    Receives exactly `len(buffer)` bytes directly into a preallocated writable buffer.
+
+    Short reads are retried until the buffer is full. If the connection times
+    out, passes `deadline` or is closed first, `IncompleteTransferError` is
+    raised with the portion of the buffer that was filled.
     """
-    ret = b""
-    print(f"Reading {length} bytes...")
+    view = memoryview(buffer).cast("B")
+    length = len(view)
+    if progress:
+        print(f"Reading {length} bytes...")
+    received = 0
     count = 0
     count_granularity = (length - 1) // 10 + 1
-    while len(ret) < length:
-        ret += soc.recv(min([4096, length - len(ret)]))
-        if len(ret) > count * count_granularity:
-            new_count = len(ret) // count_granularity
+    while received < length:
+        try:
+            _set_deadline(soc, deadline)
+            chunk = soc.recv_into(view[received:], min([1 << 16, length - received]))
+        except OSError as err:
+            raise IncompleteTransferError(view[:received], length, repr(err)) from err
+        if chunk == 0:
+            raise IncompleteTransferError(
+                view[:received], length, "connection closed by oscilloscope"
+            )
+        received += chunk
+        if progress and received > count * count_granularity:
+            new_count = received // count_granularity
             print("".join(["#" for i in range(new_count - count)]), end="")
             sys.stdout.flush()
             count = new_count
-    print("#")
-    return ret
+    if progress:
+        print("#")
+    return received
+
+
+def recv_length(soc: socket.socket, length: int, deadline: float = None) -> bytes:
+    """
+    Receives the given number of bytes.
+    """
+    ret = bytearray(length)
+    recv_into_length(soc, ret, deadline)
+    return bytes(ret)
+
+
+def recv_chunks_until(
+    soc: socket.socket, end: bytes, chunk_size: int = 1 << 16, deadline: float = None
+):
+    """
+    Yields chunks of data as they are received, up to and including a final chunk
+    ending with `end`.
+
+    Unlike `recv_until`, this receives many bytes at a time, so it must only be
+    used when nothing follows `end` on the socket.
+    """
+    while True:
+        _set_deadline(soc, deadline)
+        chunk = soc.recv(chunk_size)
+        if chunk == b"":
+            raise ConnectionError("connection closed by oscilloscope")
+        yield chunk
+        if chunk.endswith(end):
+            return
 
 
-def query_ascii(soc: socket.socket) -> bytes:
+def query_ascii(soc: socket.socket, timeout: float = None) -> bytes:
     """
     Queries ASCII output data from the oscilloscope in response to a command.
 
-    Reads to the next newline.
+    Reads to the next newline, raising `socket.timeout` if it does not arrive
+    within `timeout` seconds.
     """
-    return recv_until(soc, b"\n")
+    previous_timeout = soc.gettimeout()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    try:
+        return recv_until(soc, b"\n", deadline)
+    finally:
+        if timeout is not None:
+            soc.settimeout(previous_timeout)
 
 
-def query_binary(soc: socket.socket) -> bytes:
+def recv_block_header(soc: socket.socket, deadline: float = None) -> int:
     """
-    Queries binary data from the oscilloscope in response to a command.
+    Receives the header of an IEEE488.2 definite-length block and returns its length.
 
-    Reads according to the IEEE488.2 binary block format.
+    Whitespace left over from previous responses is skipped.
     """
-    header = soc.recv(2)
-    assert header[0] == ord("#")
-    digits = int(chr(header[1]))
-    length = int(recv_length(soc, digits))
-    data = recv_length(soc, length)
-    soc.recv(1)  # Receive and discard final newline
+    start = _recv_byte(soc, deadline)
+    while start.isspace():
+        start = _recv_byte(soc, deadline)
+    if start != b"#":
+        raise ValueError(f"expected an IEEE488.2 binary block, received {start!r}")
+    digits = _recv_byte(soc, deadline)
+    if not digits.isdigit() or digits == b"0":
+        raise ValueError(f"unsupported IEEE488.2 block length digits {digits!r}")
+    return int(b"".join(_recv_byte(soc, deadline) for _ in range(int(digits))))
+
+
+# pylint: disable-next=too-many-arguments,too-many-positional-arguments
+def recv_into_file(
+    soc: socket.socket,
+    file,
+    length: int,
+    deadline: float = None,
+    chunk_size: int = 1 << 20,
+    progress: bool = True,
+) -> int:
+    """
+    Receives exactly `length` bytes and writes them to `file` as they arrive.
+
+    Data is received into a single reusable buffer of at most `chunk_size` bytes
+    and written from it directly, so no intermediate `bytes` objects are created
+    and memory use is independent of `length`. `progress` controls whether the
+    transfer is announced.
+    """
+    buffer = memoryview(bytearray(min(chunk_size, length)))
+    if progress:
+        print(f"Reading {length} bytes...")
+    remaining = length
+    while remaining > 0:
+        chunk = buffer[: min(len(buffer), remaining)]
+        recv_into_length(soc, chunk, deadline, progress=False)
+        file.write(chunk)
+        remaining -= len(chunk)
+    return length
+
+
+def query_binary(
+    soc: socket.socket, buffer=None, timeout: float = None, progress: bool = True
+) -> bytes:
+    """
+    Queries binary data from the oscilloscope in response to a command.
+
+    Reads according to the IEEE488.2 binary block format. If a preallocated
+    `buffer` is provided, the data is received directly into it and a memoryview
+    of the filled portion is returned instead of a new `bytearray`.
+
+    If `timeout` is provided, the whole block must arrive within that many
+    seconds. A block that is cut short by a timeout or a closed connection
+    raises `IncompleteTransferError`, which holds the data received so far.
+    `progress` controls whether transfer progress is printed.
+    """
+    previous_timeout = soc.gettimeout()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    try:
+        length = recv_block_header(soc, deadline)
+        if buffer is None:
+            data = bytearray(length)
+        elif length > len(buffer):
+            raise ValueError(
+                f"block of {length} bytes does not fit in {len(buffer)} byte buffer"
+            )
+        else:
+            data = memoryview(buffer)[:length]
+        recv_into_length(soc, data, deadline, progress)
+        try:
+            recv_into_length(soc, bytearray(1), deadline, progress=False)
+        except IncompleteTransferError as err:
+            # The block itself is complete, so report it as fully received.
+            raise IncompleteTransferError(memoryview(data), length, str(err)) from err
+    finally:
+        if timeout is not None:
+            soc.settimeout(previous_timeout)
     return data
 
 
@@ -0,0 +1,97 @@
+"""
+Utilities for interpolating waveforms and resampling them onto a common time base.
+"""
+
+import numpy as np
+
+from .waveform import WaveformMetadata, Waveform, Waveforms
+
+
+def _waveforms(waveforms) -> [Waveform]:
+    """
+    Resolves a `Waveforms` object or an iterable of `Waveform` objects to a list.
+    """
+    if isinstance(waveforms, Waveforms):
+        return waveforms.all()
+    return list(waveforms)
+
+
+def interpolate(waveform: Waveform, times: np.ndarray) -> np.ndarray:
+    """
+    Returns the voltage of a waveform at the given times by linear interpolation.
+
+    Only the samples spanning `times` are read, so memory-mapped waveforms are
+    not read outside that range. Times outside the waveform are `nan`.
+
+    >>> wf = Waveform("CH1", WaveformMetadata(1.0, 0.0, 0.5, 0.0, 0.0), [0, 2, 4])
+    >>> interpolate(wf, np.array([0.5, 1.75, 3.0])).tolist()
+    [0.5, 1.75, nan]
+    """
+    times = np.asarray(times, dtype=np.float64)
+    if len(times) == 0 or len(waveform.raw_data) == 0:
+        return np.full(times.shape, np.nan)
+
+    metadata = waveform.metadata
+    start, stop = waveform.indices(times.min(), times.max())
+    start = max(start - 1, 0)
+    stop = min(stop + 1, len(waveform.raw_data))
+    samples = np.asarray(waveform.raw_data[start:stop], dtype=np.float64)
+    volts = metadata.v_mult * (samples - metadata.v_off) + metadata.v_zero
+
+    positions = (times - metadata.t_zero) / metadata.t_incr - start
+    return np.interp(
+        positions, np.arange(len(samples)), volts, left=np.nan, right=np.nan
+    )
+
+
+def common_time_base(
+    waveforms, t_incr: float = None, t0: float = None, t1: float = None
+) -> np.ndarray:
+    """
+    Returns timestamps spanning the time range covered by all of the waveforms.
+
+    `t_incr` defaults to the finest time increment among the waveforms. `t0` and
+    `t1` narrow the range further.
+    """
+    waveforms = _waveforms(waveforms)
+    if not waveforms:
+        raise ValueError("no waveforms to resample")
+    start = max(wf.metadata.t_zero for wf in waveforms)
+    end = min(
+        wf.metadata.t_zero + wf.metadata.t_incr * (len(wf.raw_data) - 1)
+        for wf in waveforms
+    )
+    if t0 is not None:
+        start = max(start, t0)
+    if t1 is not None:
+        end = min(end, t1)
+    if t_incr is None:
+        t_incr = min(wf.metadata.t_incr for wf in waveforms)
+    if end < start:
+        return np.zeros(0)
+    return start + t_incr * np.arange(int(np.floor((end - start) / t_incr + 1e-6)) + 1)
+
+
+def resample(
+    waveforms, t_incr: float = None, t0: float = None, t1: float = None
+) -> Waveforms:
+    """
+    Resamples waveforms, possibly from different files and with different time
+    increments, onto the common time base returned by `common_time_base`.
+
+    The raw data of each returned waveform is in volts, with metadata describing
+    the common time base and a unit voltage scale. No anti-aliasing is applied,
+    so waveforms should be filtered before resampling them to a coarser base.
+    """
+    waveforms = _waveforms(waveforms)
+    times = common_time_base(waveforms, t_incr, t0, t1)
+    if t_incr is None:
+        t_incr = min(wf.metadata.t_incr for wf in waveforms)
+    t_zero = float(times[0]) if len(times) > 0 else 0.0
+    metadata = WaveformMetadata(t_incr, t_zero, 1.0, 0.0, 0.0)
+    return Waveforms(
+        [
+            Waveform(waveform.channel, metadata, interpolate(waveform, times))
+            for waveform in waveforms
+        ]
+    )
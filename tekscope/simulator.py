@@ -0,0 +1,451 @@
+"""
+A local simulated oscilloscope for testing and benchmarking without hardware.
+
+The simulator listens on a TCP socket and emulates the subset of the Tektronix
+programmer interface used by this library. Every session has its own DATA
+settings, while acquisition state is shared by all sessions.
+"""
+
+import time
+import socket
+import threading
+import numpy as np
+
+from .raw import AnalogSource
+
+
+# pylint: disable-next=too-few-public-methods
+class SimulatedFault:
+    """
+    A fault injected into the next response of a `SimulatedOscilloscope` to a
+    query.
+    """
+
+    STALL = "stall"
+    DISCONNECT = "disconnect"
+
+    def __init__(self, kind: str, after: int, query: str = "CURVE?"):
+        """
+        Initializes a `SimulatedFault` object.
+
+        `kind`: `STALL` to stop sending without closing the connection, or
+            `DISCONNECT` to close the connection.
+        `after`: Number of bytes of the response sent before the fault occurs.
+            For binary curves, the block header is not counted.
+        `query`: The query whose next response is faulty.
+        """
+        self.kind = kind
+        self.after = after
+        self.query = query
+
+
+# pylint: disable-next=too-many-instance-attributes
+class SimulatedOscilloscope:
+    """
+    Class for running a simulated oscilloscope socket server in background threads.
+    """
+
+    # pylint: disable-next=too-many-arguments,too-many-positional-arguments
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        record_length: int = 10000,
+        sources: [str] = (AnalogSource.CH1,),
+        t_incr: float = 1e-9,
+        t_offset: float = 0.0,
+        trigger_interval: float = None,
+        seed: int = 0,
+        faults: [SimulatedFault] = (),
+        fragment: int = None,
+        bandwidth: float = None,
+    ):
+        """
+        Initializes and starts a `SimulatedOscilloscope`.
+
+        `host`, `port`: Address to listen on. Port 0 picks a free port, which is
+            then available as `self.port`.
+        `record_length`: Number of samples in each waveform.
+        `sources`: Channels that are initially enabled.
+        `t_incr`: The time increment between datapoints.
+        `t_offset`: Time offset added to the first datapoint of every waveform,
+            emulating trigger skew between instruments.
+        `trigger_interval`: If provided, the simulator triggers itself at this
+            interval (in seconds) while running. Otherwise, acquisitions happen
+            only when `trigger` is called.
+        `seed`: Seed for the noise added to generated waveforms.
+        `faults`: Faults injected into successive responses to their queries.
+        `fragment`: If provided, every response is sent in pieces of at most
+            this many bytes, so clients see short reads.
+        `bandwidth`: If provided, every session sends at most this many bytes
+            per second, emulating a link or instrument limited per connection.
+
+        Every command received is appended to `self.log`.
+        """
+        self.record_length = record_length
+        self.enabled = set(sources)
+        self.t_incr = t_incr
+        self.t_offset = t_offset
+        self.trigger_interval = trigger_interval
+        self.seed = seed
+        self.faults = list(faults)
+        self.fragment = fragment
+        self.bandwidth = bandwidth
+        self.cache = {}
+        self.log = []
+
+        self.lock = threading.Condition()
+        self.running = False
+        self.stop_after_sequence = False
+        self.num_sequence = 1
+        self.num_acq = 0
+        self.sequence_acq = 0
+        self.closed = False
+
+        self.server = socket.create_server((host, port))
+        self.host, self.port = self.server.getsockname()[:2]
+        self.threads = [threading.Thread(target=self._serve, daemon=True)]
+        if trigger_interval is not None:
+            self.threads.append(
+                threading.Thread(target=self._auto_trigger, daemon=True)
+            )
+        for thread in self.threads:
+            thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Stops the simulator and closes its listening socket.
+        """
+        with self.lock:
+            self.closed = True
+            self.lock.notify_all()
+        self.server.close()
+
+    def trigger(self):
+        """
+        Triggers an acquisition if the simulator is running.
+        """
+        with self.lock:
+            if not self.running:
+                return
+            self.num_acq += 1
+            self.sequence_acq += 1
+            if self.stop_after_sequence and self.sequence_acq >= self.num_sequence:
+                self.running = False
+            self.lock.notify_all()
+
+    def next_fault(self, query: str) -> SimulatedFault:
+        """
+        Removes and returns the next fault to inject into the response to
+        `query`, or `None` if there is none.
+        """
+        with self.lock:
+            for index, fault in enumerate(self.faults):
+                if fault.query == query:
+                    return self.faults.pop(index)
+        return None
+
+    def waveform(self, source: str, acq: int) -> np.ndarray:
+        """
+        Returns the raw 8-bit samples of `source` for acquisition number `acq`.
+
+        Generated waveforms are cached for the most recent acquisition.
+        """
+        with self.lock:
+            cached = self.cache.get((source, acq))
+        if cached is not None:
+            return cached
+        sources = list(AnalogSource.SOURCES)
+        index = sources.index(source) if source in sources else len(sources)
+        rng = np.random.default_rng([self.seed, acq, index])
+        phase = np.arange(self.record_length) * (2 * np.pi / (100 + 37 * index))
+        samples = 100 * np.sin(phase) + rng.normal(0, 2, self.record_length)
+        samples = np.clip(np.round(samples), -128, 127).astype(np.int8)
+        samples.flags.writeable = False
+        with self.lock:
+            if any(key[1] != acq for key in self.cache):
+                self.cache.clear()
+            self.cache[(source, acq)] = samples
+        return samples
+
+    def _auto_trigger(self):
+        """
+        Triggers periodically until the simulator is closed.
+        """
+        while True:
+            with self.lock:
+                if self.lock.wait_for(lambda: self.closed, self.trigger_interval):
+                    return
+            self.trigger()
+
+    def _serve(self):
+        """
+        Accepts sessions until the simulator is closed.
+        """
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._session, args=(conn,), daemon=True).start()
+
+    def _session(self, conn: socket.socket):
+        """
+        Handles commands from a single session until it is closed.
+        """
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        session = SimulatedSession(self, conn)
+        with conn:
+            buffer = b""
+            while True:
+                try:
+                    chunk = conn.recv(4096)
+                except OSError:
+                    return
+                if chunk == b"":
+                    return
+                buffer += chunk
+                while b"\n" in buffer:
+                    line, buffer = buffer.split(b"\n", 1)
+                    try:
+                        session.handle(line.decode("utf-8").strip())
+                    except OSError:
+                        return
+
+
+# pylint: disable-next=too-many-instance-attributes
+class SimulatedSession:
+    """
+    Class for storing the state of a single session with a `SimulatedOscilloscope`.
+    """
+
+    def __init__(self, scope: SimulatedOscilloscope, conn: socket.socket):
+        self.scope = scope
+        self.conn = conn
+        self.source = AnalogSource.CH1
+        self.start = 1
+        self.stop = scope.record_length
+        self.width = 1
+        self.encdg = "RIBINARY"
+        self.fault = None
+
+    def reply(self, data: bytes):
+        """
+        Sends a response to the session, injecting the pending fault, if any.
+        """
+        fault, self.fault = self.fault, None
+        if fault is None:
+            self.send(data)
+            return
+        self.send(data[: fault.after])
+        if fault.kind == SimulatedFault.STALL:
+            with self.scope.lock:
+                self.scope.lock.wait_for(lambda: self.scope.closed)
+        raise ConnectionAbortedError(f"injected {fault.kind} fault")
+
+    def send(self, data: bytes):
+        """
+        Sends data to the session, emulating short reads and limited bandwidth.
+        """
+        fragment = self.scope.fragment
+        bandwidth = self.scope.bandwidth
+        if fragment is None and bandwidth is None:
+            self.conn.sendall(data)
+            return
+        data = memoryview(data)
+        size = fragment or 1 << 16
+        for start in range(0, len(data), size):
+            chunk = data[start : start + size]
+            self.conn.sendall(chunk)
+            if bandwidth is not None:
+                time.sleep(len(chunk) / bandwidth)
+
+    def handle(self, command: str):
+        """
+        Handles a single command.
+        """
+        if command == "":
+            return
+        with self.scope.lock:
+            self.scope.log.append(command)
+        name, _, argument = command.partition(" ")
+        name = name.upper()
+        argument = argument.strip()
+        if name.startswith("SELECT:"):
+            self.select(name, argument)
+        elif name in COMMANDS:
+            self.fault = self.scope.next_fault(name)
+            COMMANDS[name](self, argument)
+
+    def points(self) -> (int, int):
+        """
+        Returns the 0-indexed range of points selected by DATA:START and DATA:STOP.
+        """
+        length = self.scope.record_length
+        if length == 0:
+            return 0, 0
+        start = min(max(self.start, 1), length)
+        stop = min(max(self.stop, start), length)
+        return start - 1, stop
+
+    def curve(self) -> np.ndarray:
+        """
+        Returns the selected points of the current waveform in the current width.
+        """
+        first, last = self.points()
+        with self.scope.lock:
+            acq = self.scope.num_acq
+        samples = self.scope.waveform(self.source, acq)[first:last]
+        if self.width == 2:
+            return (samples.astype(np.int16) * 256).astype(">i2")
+        return samples
+
+    def wfmoutpre(self, _):
+        """
+        Responds to WFMOUTPRE?.
+        """
+        scope = self.scope
+        if self.source not in scope.enabled:
+            self.reply(f'"{self.source}, waveform is not displayed"\n'.encode("utf-8"))
+            return
+        first, last = self.points()
+        encdg = "ASCII" if self.encdg == "ASCII" else "BINARY"
+        v_mult = 4e-3 / (256 if self.width == 2 else 1)
+        t_zero = scope.t_offset - scope.record_length / 2 * scope.t_incr
+        fields = [
+            self.width,
+            8 * self.width,
+            encdg,
+            "RI",
+            "MSB",
+            f'"{self.source}, DC coupling, simulated"',
+            last - first,
+            "Y",
+            "LINEAR",
+            '"s"',
+            f"{scope.t_incr:.6E}",
+            f"{t_zero + first * scope.t_incr:.6E}",
+            0,
+            '"V"',
+            f"{v_mult:.6E}",
+            "0.0E+0",
+            "0.0E+0",
+            "TIME",
+            "ANALOG",
+            "0.0E+0",
+            "0.0E+0",
+            "0.0E+0",
+        ]
+        self.reply((";".join(map(str, fields)) + "\n").encode("utf-8"))
+
+    def curve_query(self, _):
+        """
+        Responds to CURVE?.
+        """
+        samples = self.curve()
+        if self.encdg == "ASCII":
+            self.reply(",".join(map(str, samples.tolist())).encode("utf-8") + b"\n")
+            return
+        data = samples.tobytes()
+        length = str(len(data))
+        self.send(f"#{len(length)}{length}".encode("utf-8"))
+        self.reply(data)
+        self.send(b"\n")
+
+    def opc(self, _):
+        """
+        Responds to *OPC? once any pending single sequence has completed.
+        """
+        scope = self.scope
+        with scope.lock:
+            scope.lock.wait_for(
+                lambda: scope.closed
+                or not (scope.running and scope.stop_after_sequence)
+            )
+        self.reply(b"1\n")
+
+    def acquire_state(self, argument: str):
+        """
+        Handles ACQUIRE:STATE.
+        """
+        scope = self.scope
+        with scope.lock:
+            if argument.upper() in ("RUN", "ON", "1"):
+                scope.running = True
+                scope.sequence_acq = 0
+            else:
+                scope.running = False
+            scope.lock.notify_all()
+
+    def select(self, name: str, argument: str):
+        """
+        Handles SELECT:<source>.
+        """
+        source = name.split(":", 1)[1]
+        if argument.upper() in ("ON", "1"):
+            self.scope.enabled.add(source)
+        else:
+            self.scope.enabled.discard(source)
+
+
+def _set(attr: str, kind):
+    """
+    Returns a handler that sets a session attribute from the command argument.
+    """
+
+    def handler(session: SimulatedSession, argument: str):
+        setattr(session, attr, kind(argument))
+
+    return handler
+
+
+def _set_scope(attr: str, kind):
+    """
+    Returns a handler that sets a simulator attribute from the command argument.
+    """
+
+    def handler(session: SimulatedSession, argument: str):
+        with session.scope.lock:
+            setattr(session.scope, attr, kind(argument))
+
+    return handler
+
+
+def _reply(value):
+    """
+    Returns a handler that replies with the result of calling `value` on the session.
+    """
+
+    def handler(session: SimulatedSession, _):
+        session.reply(f"{value(session)}\n".encode("utf-8"))
+
+    return handler
+
+
+COMMANDS = {
+    "HEADER": lambda session, argument: None,
+    "CLEAR": lambda session, argument: None,
+    "*IDN?": _reply(lambda session: "TEKTRONIX,SIMULATED,0,0"),
+    "*OPC?": SimulatedSession.opc,
+    "ACQUIRE:STATE": SimulatedSession.acquire_state,
+    "ACQUIRE:STATE?": _reply(lambda session: int(session.scope.running)),
+    "ACQUIRE:NUMACQ?": _reply(lambda session: session.scope.num_acq),
+    "ACQUIRE:STOPAFTER": _set_scope(
+        "stop_after_sequence", lambda argument: argument.upper() == "SEQUENCE"
+    ),
+    "ACQUIRE:SEQUENCE:NUMSEQUENCE": _set_scope("num_sequence", int),
+    "HORIZONTAL:RECORDLENGTH?": _reply(lambda session: session.scope.record_length),
+    "DATA:SOURCE": _set("source", str.upper),
+    "DATA:START": _set("start", int),
+    "DATA:STOP": _set("stop", int),
+    "DATA:WIDTH": _set("width", int),
+    "DATA:ENCDG": _set("encdg", str.upper),
+    "WFMOUTPRE?": SimulatedSession.wfmoutpre,
+    "CURVE?": SimulatedSession.curve_query,
+}
@@ -0,0 +1,199 @@
+"""
+Utilities for frequency-domain analysis of waveforms.
+"""
+
+import functools
+import numpy as np
+
+from .waveform import Waveform
+from .io import memmap_waveforms
+
+
+# pylint: disable-next=too-few-public-methods
+class Spectrum:
+    """
+    Class for storing a one-sided spectrum in memory.
+    """
+
+    def __init__(self, channel: str, freq: np.ndarray, values: np.ndarray, unit: str):
+        """
+        Initializes a `Spectrum` object.
+
+        `channel`: The channel (e.g. "CH1") the spectrum was computed from.
+        `freq`: Frequency of each bin in Hz.
+        `values`: Spectral value of each bin.
+        `unit`: Unit of `values` (e.g. "V" or "V^2/Hz").
+        """
+        self.channel = channel
+        self.freq = freq
+        self.values = values
+        self.unit = unit
+
+
+WINDOWS = {
+    "rectangular": np.ones,
+    "hann": np.hanning,
+    "hamming": np.hamming,
+    "blackman": np.blackman,
+    "bartlett": np.bartlett,
+}
+
+
+@functools.lru_cache(maxsize=32)
+def get_window(name: str, length: int) -> np.ndarray:
+    """
+    Returns a read-only periodic window of the given length.
+
+    Windows are cached, so repeated calls with the same settings are free.
+
+    >>> get_window("hann", 4)
+    array([0. , 0.5, 1. , 0.5])
+    """
+    if name not in WINDOWS:
+        raise ValueError(f"unknown window {name!r}")
+    window = WINDOWS[name](length + 1)[:-1].astype(np.float64)
+    window.flags.writeable = False
+    return window
+
+
+# pylint: disable-next=too-few-public-methods
+class SegmentPlan:
+    """
+    Precomputed quantities for transforming segments of a fixed length.
+    """
+
+    __slots__ = ("window", "nfft", "freq", "sum", "sum_sq")
+
+    def __init__(self, window: str, nperseg: int, nfft: int):
+        """
+        Initializes a `SegmentPlan` object.
+
+        `window`: The name of the window applied to each segment.
+        `nperseg`: The number of samples in each segment.
+        `nfft`: The length of the FFT of each segment.
+        """
+        self.window = get_window(window, nperseg)
+        self.nfft = nfft
+        self.freq = np.fft.rfftfreq(nfft)
+        self.sum = float(self.window.sum())
+        self.sum_sq = float(np.dot(self.window, self.window))
+
+
+@functools.lru_cache(maxsize=32)
+def get_plan(window: str, nperseg: int, nfft: int) -> SegmentPlan:
+    """
+    Returns a cached `SegmentPlan` for the given settings.
+    """
+    return SegmentPlan(window, nperseg, nfft)
+
+
+def _resolve(source, channel: str) -> Waveform:
+    """
+    Resolves a `Waveform` or the path of a `.tek` file to a single `Waveform`.
+
+    Files are memory-mapped, so samples are only read as they are transformed.
+    """
+    if isinstance(source, Waveform):
+        return source
+    waveforms = memmap_waveforms(source)
+    if channel is None:
+        all_waveforms = waveforms.all()
+        if len(all_waveforms) == 0:
+            raise ValueError(f"no waveforms in {source!r}")
+        return all_waveforms[0]
+    waveform = waveforms.get(channel)
+    if waveform is None:
+        raise KeyError(channel)
+    return waveform
+
+
+def _to_volts(waveform: Waveform, raw: np.ndarray) -> np.ndarray:
+    """
+    Converts a block of raw samples to volts.
+    """
+    metadata = waveform.metadata
+    return metadata.v_mult * (raw.astype(np.float64) - metadata.v_off) + metadata.v_zero
+
+
+def fft(
+    source, channel: str = None, window: str = "hann", nfft: int = None
+) -> Spectrum:
+    """
+    Computes the one-sided amplitude spectrum of an entire record.
+
+    `source` is either a `Waveform` or the path of a `.tek` file, in which case
+    `channel` selects the waveform (defaulting to the first one). The result is
+    scaled so that a sinusoid of amplitude A shows up as a peak of height A.
+
+    Unlike `welch`, this transforms the whole record at once, so memory use is
+    proportional to the record length.
+    """
+    waveform = _resolve(source, channel)
+    samples = np.asarray(waveform.raw_data)
+    nperseg = len(samples)
+    if nperseg == 0:
+        raise ValueError("cannot transform an empty waveform")
+    plan = get_plan(window, nperseg, nfft or nperseg)
+
+    values = np.abs(np.fft.rfft(_to_volts(waveform, samples) * plan.window, plan.nfft))
+    values *= 2 / plan.sum
+    values[0] /= 2
+    if plan.nfft % 2 == 0:
+        values[-1] /= 2
+
+    return Spectrum(waveform.channel, plan.freq / waveform.metadata.t_incr, values, "V")
+
+
+# pylint: disable-next=too-many-arguments,too-many-positional-arguments,too-many-locals
+def welch(
+    source,
+    channel: str = None,
+    nperseg: int = 4096,
+    overlap: float = 0.5,
+    window: str = "hann",
+    detrend: bool = True,
+    batch: int = 64,
+) -> Spectrum:
+    """
+    Estimates the one-sided power spectral density of a record using Welch's method.
+
+    `source` is either a `Waveform` or the path of a `.tek` file, in which case
+    `channel` selects the waveform (defaulting to the first one). The record is
+    split into segments of `nperseg` samples overlapping by the fraction `overlap`,
+    and `batch` segments are transformed at a time, so memory use is bounded by
+    `batch * nperseg` regardless of record length. If `detrend` is set, the mean of
+    each segment is removed before windowing.
+
+    The result is in V^2/Hz.
+    """
+    waveform = _resolve(source, channel)
+    samples = waveform.raw_data
+    if not isinstance(samples, np.ndarray):
+        samples = np.asarray(samples)
+    nperseg = min(nperseg, len(samples))
+    if nperseg == 0:
+        raise ValueError("cannot transform an empty waveform")
+    step = max(1, int(nperseg * (1 - overlap)))
+    num_segments = (len(samples) - nperseg) // step + 1
+    plan = get_plan(window, nperseg, nperseg)
+
+    total = np.zeros(len(plan.freq), dtype=np.float64)
+    for first in range(0, num_segments, batch):
+        count = min(batch, num_segments - first)
+        start = first * step
+        block = samples[start : start + (count - 1) * step + nperseg]
+        segments = np.lib.stride_tricks.sliding_window_view(
+            _to_volts(waveform, block), nperseg
+        )[::step]
+        if detrend:
+            segments = segments - segments.mean(axis=1, keepdims=True)
+        spectra = np.fft.rfft(segments * plan.window, axis=1)
+        total += np.sum(spectra.real**2 + spectra.imag**2, axis=0)
+
+    fs = 1 / waveform.metadata.t_incr
+    values = total / (num_segments * fs * plan.sum_sq)
+    values[1:] *= 2
+    if nperseg % 2 == 0:
+        values[-1] /= 2
+
+    return Spectrum(waveform.channel, plan.freq * fs, values, "V^2/Hz")
@@ -0,0 +1,259 @@
+"""
+Utilities for synchronized acquisition across multiple oscilloscopes.
+"""
+
+import time
+import socket
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .raw import (
+    send_command,
+    query_ascii,
+    acquire_state_cmd,
+    acquire_stopafter_cmd,
+    acquire_numsequence_cmd,
+    AcquireState,
+    AcquireStopAfter,
+)
+from .transfer import retrieve_all_waveforms
+from .acquisition import num_acq
+from .waveform import WaveformMetadata, Waveform, Waveforms
+from .io import save_waveforms
+
+BUNDLE_SEPARATOR = "/"
+
+
+# pylint: disable-next=too-few-public-methods,too-many-instance-attributes
+class InstrumentReport:
+    """
+    Class for storing timing statistics of one instrument in a synchronized acquisition.
+    """
+
+    def __init__(self, name: str):
+        """
+        Initializes an `InstrumentReport` object.
+
+        `name`: The name of the instrument.
+        """
+        self.name = name
+        self.acq = None
+        self.armed_at = None
+        self.completed_at = None
+        self.skew = None
+        self.num_bytes = 0
+        self.transfer_time = None
+
+    def throughput(self) -> float:
+        """
+        Returns the transfer throughput in bytes per second.
+        """
+        if not self.transfer_time:
+            return 0.0
+        return self.num_bytes / self.transfer_time
+
+
+class SynchronizedCapture:
+    """
+    Class for storing the waveforms captured by multiple instruments for one trigger.
+    """
+
+    def __init__(self, waveforms: {str: Waveforms}, reports: {str: InstrumentReport}):
+        """
+        Initializes a `SynchronizedCapture` object.
+
+        `waveforms`: The waveforms retrieved from each instrument, by instrument name.
+        `reports`: Timing statistics of each instrument, by instrument name.
+        """
+        self.waveforms = waveforms
+        self.reports = reports
+
+    def acq(self) -> {str: int}:
+        """
+        Returns the acquisition number reported by each instrument.
+        """
+        return {name: report.acq for name, report in self.reports.items()}
+
+    def bundle(self, deskew: {str: float} = None) -> Waveforms:
+        """
+        Combines all waveforms into one `Waveforms` object.
+
+        Channels are renamed to `<instrument>/<channel>`. If provided, `deskew`
+        maps instrument names to a time (in seconds) subtracted from the
+        timestamps of that instrument, e.g. to compensate for trigger cable delay.
+        """
+        deskew = deskew or {}
+        bundled = []
+        for name, waveforms in self.waveforms.items():
+            offset = deskew.get(name, 0.0)
+            for waveform in waveforms.all():
+                metadata = waveform.metadata
+                bundled.append(
+                    Waveform(
+                        f"{name}{BUNDLE_SEPARATOR}{waveform.channel}",
+                        WaveformMetadata(
+                            metadata.t_incr,
+                            metadata.t_zero - offset,
+                            metadata.v_mult,
+                            metadata.v_off,
+                            metadata.v_zero,
+                        ),
+                        waveform.raw_data,
+                    )
+                )
+        return Waveforms(bundled)
+
+    def save(self, path: str, deskew: {str: float} = None):
+        """
+        Saves the bundled waveforms to the provided path.
+        """
+        save_waveforms(self.bundle(deskew), path)
+
+
+def split_bundle(waveforms: Waveforms) -> {str: Waveforms}:
+    """
+    Splits bundled waveforms back into one `Waveforms` object per instrument.
+    """
+    split = {}
+    for waveform in waveforms.all():
+        name, _, channel = waveform.channel.partition(BUNDLE_SEPARATOR)
+        split.setdefault(name, []).append(
+            Waveform(channel, waveform.metadata, waveform.raw_data)
+        )
+    return {name: Waveforms(waveforms) for name, waveforms in split.items()}
+
+
+def _num_bytes(waveforms: Waveforms) -> int:
+    """
+    Returns the number of bytes of raw data held by a `Waveforms` object.
+    """
+    return sum(np.asarray(wf.raw_data).nbytes for wf in waveforms.all())
+
+
+def _profiled(func, name: str, scope, report: InstrumentReport):
+    """
+    Calls `func(name, scope, report)` within the profiling context of `scope`.
+    """
+    with scope.profiling():
+        return func(name, scope, report)
+
+
+class AcquisitionCoordinator:
+    """
+    Class for arming several oscilloscopes that share a trigger and collecting
+    their captures concurrently.
+    """
+
+    def __init__(
+        self, scopes: dict, timeout: float = 10.0, transfer_timeout: float = None
+    ):
+        """
+        Initializes an `AcquisitionCoordinator` object.
+
+        `scopes`: Maps instrument names to connected `Oscilloscope` objects.
+        `timeout`: Maximum time (in seconds) to wait for all instruments to
+            trigger, which also bounds the acquisition count query that follows.
+        `transfer_timeout`: Bound (in seconds) on each query and curve transfer
+            when retrieving the captures. See `retrieve_all_waveforms`.
+        """
+        self.scopes = scopes
+        self.timeout = timeout
+        self.transfer_timeout = transfer_timeout
+        self.executor = ThreadPoolExecutor(max_workers=max(1, len(scopes)))
+
+    def close(self):
+        """
+        Shuts down the worker threads used by this coordinator.
+        """
+        self.executor.shutdown()
+
+    def _map(self, func, reports: {str: InstrumentReport}):
+        """
+        Runs `func(name, scope, report)` concurrently for every instrument, with
+        the profiler of its session, if any.
+        """
+        futures = {
+            name: self.executor.submit(_profiled, func, name, scope, reports[name])
+            for name, scope in self.scopes.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
+
+    @staticmethod
+    def _arm(_, scope, report: InstrumentReport):
+        """
+        Configures a single-sequence acquisition on one instrument and starts it.
+        """
+        soc = scope.soc
+        send_command(soc, acquire_state_cmd(AcquireState.STOP))
+        send_command(soc, acquire_stopafter_cmd(AcquireStopAfter.SEQUENCE))
+        send_command(soc, acquire_numsequence_cmd(1))
+        send_command(soc, acquire_state_cmd(AcquireState.RUN))
+        report.armed_at = time.perf_counter()
+
+    def _wait(self, name: str, scope, report: InstrumentReport):
+        """
+        Waits for the sequence on one instrument to complete.
+        """
+        soc = scope.soc
+        previous_timeout = soc.gettimeout()
+        soc.settimeout(self.timeout)
+        try:
+            send_command(soc, "*OPC?")
+            query_ascii(soc)
+        except socket.timeout as err:
+            raise TimeoutError(
+                f"{name} did not trigger within {self.timeout}s"
+            ) from err
+        finally:
+            soc.settimeout(previous_timeout)
+        report.completed_at = time.perf_counter()
+        report.acq = num_acq(soc, self.timeout)
+
+    def _transfer(self, _, scope, report: InstrumentReport) -> Waveforms:
+        """
+        Transfers all waveforms of the completed acquisition from one instrument,
+        without printing progress, since instruments transfer concurrently.
+        """
+        start = time.perf_counter()
+        waveforms = retrieve_all_waveforms(
+            scope.soc, self.transfer_timeout, progress=False
+        )
+        report.transfer_time = time.perf_counter() - start
+        report.num_bytes = _num_bytes(waveforms)
+        return waveforms
+
+    def arm(self) -> {str: InstrumentReport}:
+        """
+        Arms every instrument for a single-sequence acquisition.
+        """
+        reports = {name: InstrumentReport(name) for name in self.scopes}
+        self._map(self._arm, reports)
+        return reports
+
+    def wait(self, reports: {str: InstrumentReport}):
+        """
+        Waits concurrently for every armed instrument to complete its acquisition.
+
+        The skew of each instrument is the time at which its completion was observed,
+        relative to the first instrument to complete.
+        """
+        self._map(self._wait, reports)
+        first = min(report.completed_at for report in reports.values())
+        for report in reports.values():
+            report.skew = report.completed_at - first
+
+    def transfer(self, reports: {str: InstrumentReport}) -> SynchronizedCapture:
+        """
+        Transfers the completed acquisitions from every instrument concurrently.
+        """
+        return SynchronizedCapture(self._map(self._transfer, reports), reports)
+
+    def acquire(self) -> SynchronizedCapture:
+        """
+        Arms every instrument, waits for the shared trigger and transfers the
+        resulting waveforms.
+        """
+        reports = self.arm()
+        self.wait(reports)
+        return self.transfer(reports)
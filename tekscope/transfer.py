@@ -2,11 +2,22 @@
 Wrapper functions for transferring data to/from the oscilloscope.
 """
 
+import time
+import queue
 import socket
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
 from .raw import (
     send_command,
     query_ascii,
     query_binary,
+    recv_chunks_until,
+    recv_block_header,
+    recv_into_length,
+    recv_into_file,
+    IncompleteTransferError,
+    Connection,
     data_source_cmd,
     data_start_cmd,
     data_stop_cmd,
@@ -18,9 +29,11 @@ from .raw import (
     AnalogSource,
     DigitalSource,
 )
-from .parse import parse_ribinary_seq, parse_wfmoutpre
+from .parse import Preamble, AsciiDecoder, parse_preamble, parse_curve
 from .horizontal import record_length
 from .waveform import WaveformMetadata, Waveform, Waveforms
+from .io import write_waveform_header
+from .profiler import stage, add_samples, bind
 
 
 def set_data_source(soc: socket.socket, source: str):
@@ -58,54 +71,328 @@ def set_data_encdg(soc: socket.socket, encdg: str):
     send_command(soc, data_encdg_cmd(encdg))
 
 
-def get_curve(soc: socket.socket) -> bytes:
+def get_curve(
+    soc: socket.socket,
+    preamble: Preamble = None,
+    timeout: float = None,
+    progress: bool = True,
+) -> bytes:
     """
     Retrieves a curve from the oscilloscope following existing data setting.
+
+    If the `preamble` of the curve is provided, the exact receive buffer is
+    preallocated from its point count and width. If `timeout` is provided, the
+    curve must arrive within that many seconds. `progress` controls whether
+    transfer progress is printed.
     """
     send_command(soc, curve_cmd())
-    return query_binary(soc)
+    if preamble is None:
+        return query_binary(soc, timeout=timeout, progress=progress)
+    return query_binary(soc, bytearray(preamble.num_bytes()), timeout, progress)
+
+
+# pylint: disable-next=too-many-arguments,too-many-positional-arguments
+def get_curve_resumable(
+    soc: socket.socket,
+    source: str,
+    preamble: Preamble,
+    start: int = 1,
+    timeout: float = None,
+    retries: int = 3,
+    progress: bool = True,
+) -> bytes:
+    """
+    Retrieves the curve of `source` described by `preamble`, whose first point
+    is data point `start`, resuming the transfer if it fails part way.
+
+    `timeout` bounds each attempt. If an attempt times out or the connection
+    drops, `soc.reconnect()` is called (see `raw.Connection`), the data settings
+    are reapplied and only the missing points are re-requested with DATA:START
+    and DATA:STOP. They are received directly into the partially filled buffer.
+    Acquisitions must be stopped, or the resumed points may come from a
+    different acquisition. `progress` controls whether transfer progress is
+    printed.
+    """
+    width = preamble.byt_nr
+    stop = start + preamble.nr_pt - 1
+    buffer = bytearray(preamble.num_bytes())
+    filled = 0
+    attempt = 0
+    while True:
+        try:
+            send_command(soc, curve_cmd())
+            query_binary(soc, memoryview(buffer)[filled:], timeout, progress)
+            break
+        except (IncompleteTransferError, OSError) as err:
+            if isinstance(err, IncompleteTransferError):
+                filled += len(err.data) - len(err.data) % width
+                if filled == len(buffer):
+                    break
+            if attempt >= retries:
+                raise
+            attempt += 1
+            soc.reconnect()
+            set_data_source(soc, source)
+            set_data_width(soc, width)
+            set_data_encdg(soc, DataEncdg.BINARY)
+            set_data_start(soc, start + filled // width)
+            set_data_stop(soc, stop)
+
+    if attempt > 0:
+        set_data_start(soc, start)
+    return buffer
+
+
+def get_curve_ascii(
+    soc: socket.socket, timeout: float = None, decoder: AsciiDecoder = None
+) -> np.ndarray:
+    """
+    Retrieves an ASCII-encoded curve, decoding it while it is being received.
+
+    If `timeout` is provided, the curve must arrive within that many seconds.
+    A fresh `decoder` can be provided to inspect it afterwards, e.g. to find
+    the number of bytes received.
+    """
+    send_command(soc, curve_cmd())
+    previous_timeout = soc.gettimeout()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    decoder = decoder or AsciiDecoder()
+    try:
+        values = [
+            decoder.feed(chunk)
+            for chunk in recv_chunks_until(soc, b"\n", deadline=deadline)
+        ]
+    finally:
+        if timeout is not None:
+            soc.settimeout(previous_timeout)
+    values.append(decoder.finish())
+    return np.concatenate(values)
+
+
+def query_preamble(soc: socket.socket, timeout: float = None) -> bytes:
+    """
+    Queries the unparsed curve preamble from oscilloscope following existing
+    data setting.
+
+    If `timeout` is provided, the preamble must arrive within that many seconds.
+    """
+    send_command(soc, wfmoutpre_cmd())
+    return query_ascii(soc, timeout)
+
+
+def get_preamble(soc: socket.socket, timeout: float = None) -> Preamble:
+    """
+    Retrieves the full curve preamble from oscilloscope following existing data setting.
+
+    See `query_preamble` for `timeout`.
+    """
+    return parse_preamble(query_preamble(soc, timeout))
+
+
+def _get_staged_preamble(soc: socket.socket, timeout: float) -> Preamble:
+    """
+    Retrieves the curve preamble as in `get_preamble`, timing the query as the
+    `transfer` stage and the parsing as the `parse` stage.
+    """
+    with stage("transfer"):
+        response = query_preamble(soc, timeout)
+    with stage("parse"):
+        return parse_preamble(response)
 
 
 def get_waveform_metadata(soc: socket.socket) -> WaveformMetadata:
     """
     Retrieves curve parameters from oscilloscope following existing data setting.
     """
-    send_command(soc, wfmoutpre_cmd())
-    return parse_wfmoutpre(query_ascii(soc))
+    preamble = get_preamble(soc)
+    if preamble is None:
+        return None
+    return preamble.metadata()
 
 
 def retrieve_waveform_with_default_settings(
-    soc: socket.socket, source: str
+    soc: socket.socket,
+    source: str,
+    timeout: float = None,
+    retries: int = 0,
+    progress: bool = True,
 ) -> Waveform:
     """
     Helper function that retrieves waveform assuming that correct settings have been applied.
+
+    `timeout` bounds the preamble query and the transfer of the curve
+    separately, in seconds. If `retries` is nonzero, failed curve transfers are
+    resumed as in `get_curve_resumable`. `progress` controls whether transfer
+    progress is printed.
     """
     set_data_source(soc, source)
-    metadata = get_waveform_metadata(soc)
-    if metadata is None:
+    preamble = _get_staged_preamble(soc, timeout)
+    if preamble is None:
         return None
-    raw_data = parse_ribinary_seq(get_curve(soc), 1)
-    return Waveform(source, metadata, raw_data)
+    if preamble.encdg == DataEncdg.ASCII:
+        # ASCII curves are decoded while they are received.
+        with stage("transfer") as transfer:
+            decoder = AsciiDecoder()
+            raw_data = get_curve_ascii(soc, timeout, decoder)
+            transfer.num_bytes = decoder.num_bytes
+    else:
+        with stage("transfer") as transfer:
+            if retries > 0:
+                data = get_curve_resumable(
+                    soc, source, preamble, 1, timeout, retries, progress
+                )
+            else:
+                data = get_curve(soc, preamble, timeout, progress)
+            transfer.num_bytes = len(data)
+        with stage("parse"):
+            raw_data = parse_curve(data, preamble)
+    with stage("construct"):
+        waveform = Waveform(source, preamble.metadata(), raw_data)
+    add_samples(len(raw_data))
+    return waveform
+
+
+def get_data_format(soc: socket.socket) -> (str, int):
+    """
+    Returns the `(encoding, width)` that curves are transferred in by default
+    over `soc`: the `data_format` of a `raw.Connection`, or 8-bit RI binary.
+    """
+    if isinstance(soc, Connection):
+        return soc.data_format
+    return (DataEncdg.BINARY, 1)
 
 
-def set_default_waveform_settings(soc: socket.socket):
+def set_default_waveform_settings(
+    soc: socket.socket,
+    encdg: str = None,
+    width: int = None,
+    timeout: float = None,
+):
     """
     Helper function for setting up correct settings for retrieving waveforms.
+
+    `encdg` and `width` default to those returned by `get_data_format`.
+    `timeout` bounds the record length query in seconds.
+    """
+    default_encdg, default_width = get_data_format(soc)
+    encdg = encdg or default_encdg
+    width = width or default_width
+    samples = record_length(soc, timeout)
+    set_data_start(soc, 1)
+    set_data_stop(soc, samples)
+    set_data_width(soc, width)
+    set_data_encdg(soc, encdg)
+
+
+# Every `(encoding, width)` supported for curve transfers.
+DATA_FORMATS = [
+    (DataEncdg.BINARY, 1),
+    (DataEncdg.BINARY, 2),
+    (DataEncdg.ASCII, 1),
+    (DataEncdg.ASCII, 2),
+]
+
+
+def benchmark_data_formats(
+    soc: socket.socket,
+    source: str,
+    num_points: int = 10000,
+    formats=None,
+    repeats: int = 3,
+) -> {(str, int): float}:
+    """
+    Measures the time per point to transfer and decode the first `num_points`
+    points of `source` in each `(encoding, width)` of `formats`, keeping the
+    best of `repeats` attempts.
+
+    The data settings are left as set by the last format measured.
+    """
+    formats = formats or DATA_FORMATS
+    samples = min(num_points, record_length(soc))
+    set_data_source(soc, source)
+    set_data_start(soc, 1)
+    set_data_stop(soc, samples)
+
+    seconds_per_point = {}
+    for encdg, width in formats:
+        set_data_width(soc, width)
+        set_data_encdg(soc, encdg)
+        preamble = get_preamble(soc)
+        if preamble is None:
+            raise ValueError(f"{source} is not available for transfer")
+        best = None
+        for _ in range(repeats):
+            start = time.perf_counter()
+            if encdg == DataEncdg.ASCII:
+                get_curve_ascii(soc)
+            else:
+                parse_curve(get_curve(soc, preamble, progress=False), preamble)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        seconds_per_point[(encdg, width)] = best / samples
+    return seconds_per_point
+
+
+def detect_bit_nr(soc: socket.socket, source: str, num_points: int = 10000) -> int:
     """
-    samples = record_length(soc)
+    Detects whether the first `num_points` points of `source` carry more than 8
+    bits of resolution, returning 16 if they do and 8 otherwise.
+
+    The points are transferred 2 bytes wide, and any nonzero low byte means that
+    a 1 byte transfer would lose resolution.
+    """
+    samples = min(num_points, record_length(soc))
+    set_data_source(soc, source)
     set_data_start(soc, 1)
     set_data_stop(soc, samples)
-    set_data_width(soc, 1)
+    set_data_width(soc, 2)
     set_data_encdg(soc, DataEncdg.BINARY)
+    preamble = get_preamble(soc)
+    if preamble is None:
+        raise ValueError(f"{source} is not available for transfer")
+    raw_data = parse_curve(get_curve(soc, preamble, progress=False), preamble)
+    return 16 if np.any(raw_data.astype(np.int64) % 256) else 8
+
 
+def negotiate_data_format(
+    soc: socket.socket, source: str, bit_nr: int = None, num_points: int = 10000
+) -> (str, int):
+    """
+    Benchmarks the available encodings on a short prefix of `source`, then
+    applies default waveform settings with the fastest `(encoding, width)`
+    that preserves `bit_nr` bits of resolution, and returns it.
+
+    If `bit_nr` is not provided, it is detected with `detect_bit_nr`. The
+    encoding is chosen purely by measurement, since the relative cost of
+    ASCII and binary transfers depends on the firmware and the link.
+
+    If `soc` is a `raw.Connection`, the format is stored as its `data_format`,
+    so that later retrievals over it use the format too.
+    """
+    if bit_nr is None:
+        bit_nr = detect_bit_nr(soc, source, num_points)
+    width = 1 if bit_nr <= 8 else 2
+    formats = [(DataEncdg.BINARY, width), (DataEncdg.ASCII, width)]
+    seconds_per_point = benchmark_data_formats(soc, source, num_points, formats)
+    best = min(seconds_per_point, key=seconds_per_point.get)
+    if isinstance(soc, Connection):
+        soc.data_format = best
+    set_default_waveform_settings(soc, *best)
+    return best
 
-def retrieve_waveform(soc: socket.socket, source: str) -> Waveform:
+
+def retrieve_waveform(
+    soc: socket.socket, source: str, timeout: float = None, retries: int = 0
+) -> Waveform:
     """
     Retrieves a waveform from the oscilloscope as a `Waveform` object.
+
+    See `retrieve_waveform_with_default_settings` for `timeout` and `retries`.
+    `timeout` also bounds the record length query.
     """
     assert AnalogSource.is_valid(source) or DigitalSource.is_valid(source)
-    set_default_waveform_settings(soc)
-    return retrieve_waveform_with_default_settings(soc, source)
+    set_default_waveform_settings(soc, timeout=timeout)
+    return retrieve_waveform_with_default_settings(soc, source, timeout, retries)
 
 
 def retrieve_waveform_parameters(soc: socket.socket, source: str) -> WaveformMetadata:
@@ -117,20 +404,244 @@ def retrieve_waveform_parameters(soc: socket.socket, source: str) -> WaveformMet
     return get_waveform_metadata(soc)
 
 
-def retrieve_all_waveforms(soc: socket.socket) -> Waveforms:
+def retrieve_all_waveforms(
+    soc: socket.socket, timeout: float = None, retries: int = 0, progress: bool = True
+) -> Waveforms:
     """
     Retrieves all analog and digital waveforms from the oscilloscope as a `Waveforms` object.
+
+    See `retrieve_waveform_with_default_settings` for `timeout`, `retries` and
+    `progress`. `timeout` also bounds the record length query.
     """
-    set_default_waveform_settings(soc)
+    set_default_waveform_settings(soc, timeout=timeout)
 
     waveforms = []
     for source in AnalogSource.SOURCES:
-        waveform = retrieve_waveform_with_default_settings(soc, source)
+        waveform = retrieve_waveform_with_default_settings(
+            soc, source, timeout, retries, progress
+        )
         if waveform is not None:
             waveforms.append(waveform)
     for source in DigitalSource.SOURCES:
-        waveform = retrieve_waveform_with_default_settings(soc, source)
+        waveform = retrieve_waveform_with_default_settings(
+            soc, source, timeout, retries, progress
+        )
         if waveform is not None:
             waveforms.append(waveform)
 
-    return Waveforms(waveforms)
+    with stage("construct"):
+        return Waveforms(waveforms)
+
+
+def save_waveform_passthrough(
+    soc: socket.socket,
+    source: str,
+    file,
+    timeout: float = None,
+    progress: bool = True,
+) -> bool:
+    """
+    Streams the curve of `source` from the socket straight into `file` in the
+    `.tek` format, without decoding the samples.
+
+    Assumes that 8-bit RI binary waveform settings have been applied, e.g. with
+    `set_default_waveform_settings(soc, DataEncdg.BINARY, 1)`.
+    The samples can later be loaded lazily with `io.memmap_waveforms`. Returns
+    whether the source was available.
+
+    `timeout` bounds the preamble query and the transfer of the curve
+    separately, in seconds. `file` must be seekable. If the transfer fails, the partially written
+    record is truncated away before the error is raised, so that `file` only
+    ever holds complete waveforms. `progress` controls whether transfer
+    progress is printed.
+    """
+    set_data_source(soc, source)
+    preamble = _get_staged_preamble(soc, timeout)
+    if preamble is None:
+        return False
+    if (preamble.encdg, preamble.bn_fmt, preamble.byt_nr) != (
+        DataEncdg.BINARY,
+        "RI",
+        1,
+    ):
+        raise ValueError("passthrough requires 8-bit RI binary data")
+
+    with stage("transfer") as transfer:
+        send_command(soc, curve_cmd())
+        previous_timeout = soc.gettimeout()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        position = file.tell()
+        try:
+            length = recv_block_header(soc, deadline)
+            write_waveform_header(file, source, preamble.metadata(), length)
+            recv_into_file(soc, file, length, deadline, progress=progress)
+            recv_into_length(soc, bytearray(1), deadline, progress=False)
+        except BaseException:
+            # Drop the partial record so that the file stays readable.
+            file.seek(position)
+            file.truncate()
+            raise
+        finally:
+            if timeout is not None:
+                soc.settimeout(previous_timeout)
+        transfer.num_bytes = length
+    add_samples(length)
+    return True
+
+
+def save_all_waveforms_passthrough(
+    soc: socket.socket, file, timeout: float = None, progress: bool = True
+) -> [str]:
+    """
+    Streams all analog and digital waveforms from the oscilloscope straight into
+    `file` in the `.tek` format, without decoding the samples.
+
+    Returns the sources that were saved. See `save_waveform_passthrough` for
+    `timeout` and failed transfers.
+    """
+    set_default_waveform_settings(soc, DataEncdg.BINARY, 1, timeout)
+    return [
+        source
+        for source in AnalogSource.SOURCES + DigitalSource.SOURCES
+        if save_waveform_passthrough(soc, source, file, timeout, progress)
+    ]
+
+
+class ConnectionPool:
+    """
+    Class for sharing a fixed set of connections to the oscilloscope between threads.
+    """
+
+    def __init__(self, connect, size: int, timeout: float = None):
+        """
+        Initializes a `ConnectionPool` object, opening `size` connections.
+
+        `connect`: Callable returning a new connection, e.g. a `raw.Connection`.
+            Each connection must be an independent session on the oscilloscope.
+        `timeout`: Bound (in seconds) on the queries that set up each connection.
+        """
+        self.connections = [connect() for _ in range(size)]
+        self.idle = queue.Queue()
+        for soc in self.connections:
+            set_default_waveform_settings(soc, timeout=timeout)
+            self.idle.put(soc)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Closes every connection in the pool.
+        """
+        for soc in self.connections:
+            soc.close()
+
+    def run(self, func, *args):
+        """
+        Calls `func(soc, *args)` with an idle connection, returning the result.
+        """
+        soc = self.idle.get()
+        try:
+            return func(soc, *args)
+        finally:
+            self.idle.put(soc)
+
+
+def retrieve_all_waveforms_parallel(
+    connect, connections: int = 4, sources: [str] = None, timeout: float = None
+) -> Waveforms:
+    """
+    Retrieves waveforms over several connections at once, one channel per
+    connection at a time, as a `Waveforms` object.
+
+    `connect` is a callable returning a new connection (e.g. a `raw.Connection`),
+    and must yield independent sessions on the oscilloscope, each with its own
+    data settings. `sources` defaults to all analog and digital sources.
+    See `retrieve_waveform_with_default_settings` for `timeout`. Progress is not
+    printed, since transfers run concurrently.
+    """
+    sources = sources or AnalogSource.SOURCES + DigitalSource.SOURCES
+    with ConnectionPool(connect, connections, timeout) as pool, ThreadPoolExecutor(
+        connections
+    ) as executor:
+        run = bind(pool.run)
+        futures = [
+            executor.submit(
+                run,
+                retrieve_waveform_with_default_settings,
+                source,
+                timeout,
+                0,
+                False,
+            )
+            for source in sources
+        ]
+        waveforms = [future.result() for future in futures]
+
+    return Waveforms([waveform for waveform in waveforms if waveform is not None])
+
+
+def _get_source_preamble(soc, source: str, timeout: float) -> Preamble:
+    """
+    Retrieves the preamble of `source`.
+    """
+    set_data_source(soc, source)
+    return get_preamble(soc, timeout)
+
+
+def _get_curve_window(soc, source: str, window: (int, int), buffer, timeout):
+    """
+    Receives the points in the 1-indexed inclusive `(start, stop)` window of the
+    binary curve of `source` into `buffer`, without printing progress.
+    """
+    start, stop = window
+    set_data_source(soc, source)
+    set_data_start(soc, start)
+    set_data_stop(soc, stop)
+    send_command(soc, curve_cmd())
+    query_binary(soc, buffer, timeout, progress=False)
+
+
+def retrieve_waveform_parallel(
+    connect, source: str, connections: int = 4, timeout: float = None
+) -> Waveform:
+    """
+    Retrieves a single waveform as a `Waveform` object, splitting its samples
+    into one window per connection.
+
+    Each window is received directly into its slice of a shared preallocated
+    buffer, so the data format of the connections must be binary. See
+    `retrieve_all_waveforms_parallel` for `connect` and `timeout`.
+    """
+    with ConnectionPool(connect, connections, timeout) as pool, ThreadPoolExecutor(
+        connections
+    ) as executor:
+        preamble = pool.run(_get_source_preamble, source, timeout)
+        if preamble is None:
+            return None
+        if preamble.encdg == DataEncdg.ASCII:
+            raise ValueError("parallel windows require a binary data format")
+        num_points = preamble.nr_pt
+        width = preamble.byt_nr
+        buffer = bytearray(preamble.num_bytes())
+        view = memoryview(buffer)
+        step = max(1, -(-num_points // connections))
+        run = bind(pool.run)
+        futures = [
+            executor.submit(
+                run,
+                _get_curve_window,
+                source,
+                (first + 1, min(first + step, num_points)),
+                view[first * width : (first + step) * width],
+                timeout,
+            )
+            for first in range(0, num_points, step)
+        ]
+        for future in futures:
+            future.result()
+
+    return Waveform(source, preamble.metadata(), parse_curve(buffer, preamble))
@@ -0,0 +1,153 @@
+"""
+Utilities for watching the oscilloscope and transferring only new acquisitions.
+"""
+
+import socket
+import asyncio
+import threading
+from functools import partial
+
+from .acquisition import num_acq
+from .profiler import bind
+from .transfer import retrieve_all_waveforms
+from .waveform import Waveforms
+
+
+# pylint: disable-next=too-many-instance-attributes
+class Watcher:
+    """
+    Class for polling the cheap ACQUIRE:NUMACQ? query and transferring waveforms
+    only when the acquisition count changes.
+
+    Iterate over a `Watcher` (synchronously or with `async for`) to receive a
+    `Waveforms` object for every new acquisition. The socket must not be used
+    by anything else while a watcher is running.
+    """
+
+    # pylint: disable-next=too-many-arguments,too-many-positional-arguments
+    def __init__(
+        self,
+        soc: socket.socket,
+        interval: float = 0.1,
+        max_interval: float = 2.0,
+        backoff: float = 1.5,
+        skip_stale: bool = True,
+        retrieve=None,
+        timeout: float = None,
+    ):
+        """
+        Initializes a `Watcher` object.
+
+        `interval`: Time (in seconds) between polls right after a change.
+        `max_interval`: Upper bound on the time between polls.
+        `backoff`: Factor by which the time between polls grows after every
+            poll that finds no change.
+        `skip_stale`: When iterating asynchronously, whether to drop frames the
+            consumer has not picked up yet once a newer one arrives. Otherwise
+            every frame is queued.
+        `retrieve`: Function called with the socket to transfer waveforms.
+            Defaults to `retrieve_all_waveforms` bounded by `timeout`, without
+            printing transfer progress.
+        `timeout`: Bound (in seconds) on each acquisition count query, and on
+            each query and curve transfer of the default `retrieve`.
+
+        Transfers are recorded by the profiler active when the watcher is
+        created, if any.
+
+        `last_acq` holds the acquisition count of the latest frame. Counters of
+        `polls`, `transfers` and `skipped` acquisitions (those that happened
+        between polls or were dropped as stale) are kept for monitoring.
+        """
+        self.soc = soc
+        self.interval = interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.skip_stale = skip_stale
+        self.retrieve = bind(
+            retrieve or partial(retrieve_all_waveforms, timeout=timeout, progress=False)
+        )
+        self.timeout = timeout
+        self.last_acq = None
+        self.polls = 0
+        self.transfers = 0
+        self.skipped = 0
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.delay = interval
+
+    def stop(self):
+        """
+        Stops iteration after the current poll.
+        """
+        self.stopped.set()
+
+    def poll(self) -> Waveforms:
+        """
+        Polls the acquisition count once, returning new waveforms if it changed
+        since the last poll and `None` otherwise.
+
+        The first poll only records the current count. The delay before the next
+        poll is reset after a change and grown by `backoff` otherwise.
+        """
+        self.polls += 1
+        count = num_acq(self.soc, self.timeout)
+        if self.last_acq is None or count == self.last_acq:
+            if self.last_acq is None:
+                self.last_acq = count
+            self.delay = min(self.delay * self.backoff, self.max_interval)
+            return None
+
+        if count > self.last_acq + 1:
+            with self.lock:
+                self.skipped += count - self.last_acq - 1
+        self.last_acq = count
+        self.delay = self.interval
+        self.transfers += 1
+        return self.retrieve(self.soc)
+
+    def __iter__(self):
+        """
+        Yields a `Waveforms` object for every new acquisition until stopped.
+        """
+        while not self.stopped.is_set():
+            waveforms = self.poll()
+            if waveforms is not None:
+                yield waveforms
+            else:
+                self.stopped.wait(self.delay)
+
+    async def __aiter__(self):
+        """
+        Yields a `Waveforms` object for every new acquisition until stopped.
+
+        Polling and transfers run in a worker thread, so they continue while the
+        consumer is busy and never block the event loop.
+        """
+        frames = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+
+        def deliver(waveforms: Waveforms):
+            if self.skip_stale:
+                while not frames.empty():
+                    frames.get_nowait()
+                    with self.lock:
+                        self.skipped += 1
+            frames.put_nowait(waveforms)
+
+        def produce():
+            try:
+                for waveforms in self:
+                    loop.call_soon_threadsafe(deliver, waveforms)
+            finally:
+                loop.call_soon_threadsafe(frames.put_nowait, None)
+
+        producer = loop.run_in_executor(None, produce)
+        try:
+            while True:
+                waveforms = await frames.get()
+                if waveforms is None:
+                    break
+                yield waveforms
+        finally:
+            self.stop()
+            await producer
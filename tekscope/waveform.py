@@ -2,6 +2,14 @@
 Types and utilities for storing and interacting with waveforms in memory.
 """
 
+import math
+
+# Tolerance (in samples) for timestamps that fall on a sample boundary.
+WINDOW_TOLERANCE = 1e-6
+
+# Names of the `WaveformMetadata` fields, in constructor order.
+METADATA_FIELDS = ("t_incr", "t_zero", "v_mult", "v_off", "v_zero")
+
 
 # pylint: disable-next=too-few-public-methods
 class WaveformMetadata:
@@ -67,6 +75,42 @@ class Waveform:
             for raw_point in self.raw_data
         ]
 
+    def indices(self, t0: float, t1: float) -> (int, int):
+        """
+        Returns the `[start, stop)` range of sample indices with timestamps
+        between `t0` and `t1` inclusive, clamped to the available samples.
+
+        Indices are computed directly from the metadata, so no timestamps are built.
+        """
+        metadata = self.metadata
+        start = math.ceil((t0 - metadata.t_zero) / metadata.t_incr - WINDOW_TOLERANCE)
+        stop = math.floor((t1 - metadata.t_zero) / metadata.t_incr + WINDOW_TOLERANCE)
+        length = len(self.raw_data)
+        start = min(max(start, 0), length)
+        return start, min(max(stop + 1, start), length)
+
+    def window(self, t0: float, t1: float) -> "Waveform":
+        """
+        Returns a `Waveform` holding the samples with timestamps between `t0` and
+        `t1` inclusive.
+
+        The raw data is a slice of this waveform's raw data, so for NumPy arrays
+        (including memory-mapped ones) it is a view and no samples are read.
+        """
+        start, stop = self.indices(t0, t1)
+        metadata = self.metadata
+        return Waveform(
+            self.channel,
+            WaveformMetadata(
+                metadata.t_incr,
+                metadata.t_zero + metadata.t_incr * start,
+                metadata.v_mult,
+                metadata.v_off,
+                metadata.v_zero,
+            ),
+            self.raw_data[start:stop],
+        )
+
 
 class Waveforms:
     """
@@ -96,3 +140,10 @@ class Waveforms:
         Returns a list of all waveforms stored in this object.
         """
         return list(self.waveform_dict.values())
+
+    def window(self, t0: float, t1: float) -> "Waveforms":
+        """
+        Returns a `Waveforms` object holding the window between `t0` and `t1` of
+        every waveform. See `Waveform.window`.
+        """
+        return Waveforms([waveform.window(t0, t1) for waveform in self.all()])
@@ -0,0 +1,66 @@
+"""
+Tests for averaging repeated captures.
+"""
+
+import numpy as np
+
+from tekscope.waveform import Waveform, WaveformMetadata
+from tekscope.average import WaveformAccumulator, accumulate
+
+
+def test_accumulate():
+    """
+    Test mean, standard deviation and envelope of integer captures.
+    """
+    metadata = WaveformMetadata(1e-9, 0, 20e-3, -125, 0)
+    captures = [
+        Waveform("CH1", metadata, [1, 2, 3, 4]),
+        Waveform("CH1", metadata, [3, 2, 1, 4]),
+        Waveform("CH1", metadata, [2, 2, 5, 4]),
+    ]
+
+    accumulator = accumulate(iter(captures))
+
+    assert accumulator.count == 3
+    assert accumulator.channel == "CH1"
+    stacked = np.array([wf.raw_data for wf in captures])
+    assert np.allclose(accumulator.mean().raw_data, stacked.mean(axis=0))
+    assert np.allclose(
+        accumulator.mean().voltage(), 20e-3 * (stacked.mean(axis=0) + 125)
+    )
+    std = accumulator.std()
+    assert np.allclose(std.raw_data, stacked.std(axis=0, ddof=1))
+    assert np.allclose(std.voltage(), 20e-3 * stacked.std(axis=0, ddof=1))
+    low, high = accumulator.envelope()
+    assert low.raw_data.tolist() == [1, 2, 1, 4]
+    assert high.raw_data.tolist() == [3, 2, 5, 4]
+
+
+def test_accumulate_raw_sequences():
+    """
+    Test statistics of captures given as plain sequences without metadata.
+    """
+    accumulator = WaveformAccumulator()
+    accumulator.add([1, 2, 3])
+    accumulator.add([2, 2, 2])
+
+    assert accumulator.mean().metadata is None
+    std = accumulator.std()
+    assert std.metadata is None
+    assert np.allclose(std.raw_data, np.std([[1, 2, 3], [2, 2, 2]], axis=0, ddof=1))
+
+
+def test_trigger_alignment():
+    """
+    Test that sub-sample trigger alignment removes jitter between captures.
+    """
+    metadata = WaveformMetadata(1e-9, 0, 10e-3, 0, 0)
+    indices = np.arange(200)
+    accumulator = WaveformAccumulator(metadata=metadata, trigger_level=0.0)
+    for delay in [0.0, 0.25, -0.4, 0.6]:
+        accumulator.add(np.clip(indices - 100 - delay, -50, 50))
+    assert not accumulator.add(np.zeros(200) - 1)
+
+    assert accumulator.count == 4
+    assert accumulator.rejected == 1
+    assert np.allclose(accumulator.std().voltage()[60:140], 0)
@@ -0,0 +1,45 @@
+"""
+Tests for the benchmark suite.
+"""
+
+import os
+import copy
+
+from benchmarks import BENCHMARKS, run, save, load, compare
+from benchmarks import suite  # pylint: disable=unused-import
+
+from .context import BUILD_DIR
+
+
+def test_run_and_compare():
+    """
+    Test running every benchmark at a small size and comparing against itself.
+    """
+    results = run(sizes=[1000], repeats=1, min_time=0, log=lambda _: None)
+
+    assert set(BENCHMARKS) <= {key.split("[")[0] for key in results["results"]}
+    save_path = os.path.join(BUILD_DIR, "test_run_and_compare.json")
+    save(results, save_path)
+    loaded = load(save_path)
+
+    comparisons = compare(loaded, results)
+    assert len(comparisons) == len(results["results"])
+    assert not any(comparison["regression"] for comparison in comparisons)
+    assert not any(comparison["missing"] for comparison in comparisons)
+
+
+def test_compare_regression_and_missing():
+    """
+    Test flagging a benchmark slower than its baseline and one missing from the
+    current run.
+    """
+    results = run(["tek_write"], [1000], repeats=1, min_time=0, log=lambda _: None)
+    baseline = copy.deepcopy(results)
+    baseline["results"]["tek_write[1000]"]["seconds"] /= 2
+    baseline["results"]["tek_read[1000]"] = {"seconds": 1.0}
+
+    comparisons = {c["name"]: c for c in compare(baseline, results)}
+    assert comparisons["tek_write[1000]"]["regression"]
+    assert comparisons["tek_write[1000]"]["ratio"] == 2
+    assert comparisons["tek_read[1000]"]["missing"]
+    assert comparisons["tek_read[1000]"]["ratio"] is None
@@ -0,0 +1,78 @@
+"""
+Tests for the memory-bounded waveforms container.
+"""
+
+import numpy as np
+
+from tekscope.waveform import WaveformMetadata, Waveform
+from tekscope.bounded import BoundedWaveforms
+from tekscope.io import read_waveforms
+
+
+def _waveform(channel: str, length: int, dtype=np.int8, seed=0) -> Waveform:
+    """
+    Returns a waveform with random raw data.
+    """
+    rng = np.random.default_rng(seed)
+    raw_data = rng.integers(-128, 128, length).astype(dtype)
+    return Waveform(channel, WaveformMetadata(1e-9, 0.0, 0.01, 0.0, 0.0), raw_data)
+
+
+def test_bounded_waveforms():
+    """
+    Test that least recently used waveforms are spilled and faulted back in.
+    """
+    waveforms = [
+        _waveform("CH1", 1000, seed=1),
+        _waveform("CH2", 1000, np.int16, seed=2),
+        _waveform("CH3", 1000, seed=3),
+    ]
+    with BoundedWaveforms(waveforms, memory_budget=3000) as bounded:
+        assert bounded.stats()["resident"] == 2
+        assert bounded.evictions == 1
+        assert bounded.resident_bytes <= 3000
+        assert [wf.channel for wf in bounded.all()] == ["CH1", "CH2", "CH3"]
+        assert bounded.misses == 0
+
+        # CH1 was least recently used, so it was spilled.
+        assert np.array_equal(bounded.get("CH1").raw_data, waveforms[0].raw_data)
+        assert bounded.misses == 1
+        assert bounded.evictions == 2
+
+        # CH2 was evicted to make room for CH1 and keeps its dtype.
+        ch2 = bounded.get("CH2")
+        assert ch2.raw_data.dtype == np.int16
+        assert np.array_equal(ch2.raw_data, waveforms[1].raw_data)
+        assert bounded.get("CH2") is ch2
+        assert bounded.hits == 1
+        assert bounded.get("CH4") is None
+
+        for waveform, loaded in zip(waveforms, bounded.all()):
+            assert np.array_equal(loaded.raw_data, waveform.raw_data)
+            assert loaded.metadata is waveform.metadata
+
+        # Waveforms larger than the budget are returned memory-mapped.
+        bounded.add(_waveform("CH4", 4000, seed=4))
+        bounded.get("CH1")
+        assert isinstance(bounded.get("CH4").raw_data, np.memmap)
+        assert bounded.stats()["spilled"] >= 1
+
+
+def test_spill_list_waveforms():
+    """
+    Test that list raw data, as loaded from `.tek` files, spills as 8-bit records.
+    """
+    metadata = WaveformMetadata(1e-9, 0.0, 0.01, 0.0, 0.0)
+    waveforms = [
+        Waveform(channel, metadata, [-128, 0, 127] * 100) for channel in ["CH1", "CH2"]
+    ]
+    with BoundedWaveforms(waveforms, memory_budget=3000) as bounded:
+        assert bounded.evictions == 1
+        bounded.spill_file.seek(0)
+        spilled = read_waveforms(bounded.spill_file).all()
+        assert [wf.channel for wf in spilled] == ["CH1"]
+        assert spilled[0].raw_data == waveforms[0].raw_data
+
+        ch1 = bounded.get("CH1")
+        assert ch1.raw_data.dtype == np.int8
+        assert ch1.raw_data.tolist() == waveforms[0].raw_data
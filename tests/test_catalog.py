@@ -0,0 +1,68 @@
+"""
+Tests for cataloguing the headers of many `.tek` files.
+"""
+
+import os
+import shutil
+import numpy as np
+
+from tekscope.waveform import Waveform, WaveformMetadata, Waveforms
+from tekscope.io import save_waveforms
+from tekscope.catalog import Catalog
+
+from .context import BUILD_DIR
+
+
+def _save(path: str, t_incr: float, v_mult: float, length: int):
+    """
+    Saves a CH1/CH2 capture with the given settings.
+    """
+    save_waveforms(
+        Waveforms(
+            [
+                Waveform(
+                    channel,
+                    WaveformMetadata(t_incr, 0.0, v_mult, 0.0, 0.0),
+                    np.full(length, i, dtype=np.int8),
+                )
+                for i, channel in enumerate(["CH1", "CH2"])
+            ]
+        ),
+        path,
+    )
+
+
+def test_catalog():
+    """
+    Test building, querying and incrementally updating a catalog.
+    """
+    root = os.path.join(BUILD_DIR, "test_catalog")
+    shutil.rmtree(root, ignore_errors=True)
+    os.makedirs(os.path.join(root, "day2"))
+    _save(os.path.join(root, "a.tek"), 1e-9, 20e-3, 100)
+    _save(os.path.join(root, "b.tek"), 0.4e-9, 20e-3, 200)
+    _save(os.path.join(root, "day2", "c.tek"), 0.4e-9, 50e-3, 300)
+    with open(os.path.join(root, "broken.tek"), "wb") as file:
+        file.write(b"\x03CH1\x00")
+
+    with Catalog(os.path.join(root, "catalog.sqlite")) as catalog:
+        stats = catalog.update(root, workers=2)
+        assert (stats["added"], stats["updated"], stats["removed"]) == (3, 0, 0)
+        assert [os.path.basename(path) for path, _ in stats["errors"]] == ["broken.tek"]
+        assert len(catalog.files()) == 3
+
+        entries = catalog.find(channel="CH2", v_mult=20e-3, t_incr__lt=1e-9)
+        assert [os.path.basename(entry.path) for entry in entries] == ["b.tek"]
+        waveform = entries[0].load()
+        assert waveform.channel == "CH2"
+        assert waveform.metadata.t_incr == 0.4e-9
+        assert np.array_equal(waveform.raw_data, np.ones(200, dtype=np.int8))
+        assert len(catalog.find(num_samples__ge=200)) == 4
+
+        _save(os.path.join(root, "a.tek"), 0.2e-9, 20e-3, 400)
+        os.remove(os.path.join(root, "day2", "c.tek"))
+        stats = catalog.update(root)
+        assert (stats["added"], stats["updated"], stats["removed"]) == (0, 1, 1)
+        assert stats["unchanged"] == 1
+        assert len(catalog.find(channel="CH2", t_incr__lt=1e-9)) == 2
+        assert not catalog.find(v_mult=50e-3)
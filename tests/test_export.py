@@ -0,0 +1,136 @@
+"""
+Tests for exporting and importing waveforms in scientific formats.
+"""
+
+import os
+import zipfile
+import numpy as np
+import pytest
+
+from tekscope.waveform import Waveform, Waveforms, WaveformMetadata
+from tekscope.io import save_waveforms
+from tekscope.export import export_waveforms, import_waveforms, import_npz
+
+from .context import BUILD_DIR
+
+
+def example_waveforms():
+    """
+    Returns a pair of example waveforms.
+    """
+    metadata1 = WaveformMetadata(1.6e-9, -504e-6, 20e-3, -125, 0)
+    raw_data1 = [1, 2, 3, 4, 5, 6, 7, 8]
+    wf1 = Waveform("CH1", metadata1, raw_data1)
+
+    metadata2 = WaveformMetadata(1.6e-9, -504e-6, 80e-3, 0, 0)
+    raw_data2 = [-128, 127, 0, -1, 5]
+    wf2 = Waveform("CH2", metadata2, raw_data2)
+
+    return Waveforms([wf1, wf2])
+
+
+def check_round_trip(waveforms: Waveforms, original: Waveforms = None):
+    """
+    Checks that imported waveforms match `original`, which defaults to
+    `example_waveforms`.
+    """
+    original = original or example_waveforms()
+    assert sorted(wf.channel for wf in waveforms.all()) == sorted(
+        wf.channel for wf in original.all()
+    )
+    for expected in original.all():
+        loaded = waveforms.get(expected.channel)
+        assert np.asarray(loaded.raw_data).dtype == np.int8
+        assert np.asarray(loaded.raw_data).tolist() == expected.raw_data
+        assert np.isclose(loaded.metadata.t_incr, expected.metadata.t_incr)
+        assert np.isclose(loaded.metadata.t_zero, expected.metadata.t_zero)
+        assert np.isclose(loaded.metadata.v_mult, expected.metadata.v_mult)
+        assert np.isclose(loaded.metadata.v_off, expected.metadata.v_off)
+        assert np.isclose(loaded.metadata.v_zero, expected.metadata.v_zero)
+
+
+def test_npz_round_trip():
+    """
+    Test exporting a `.tek` file to `.npz` in small chunks and memory-mapping it back.
+    """
+    tek_path = os.path.join(BUILD_DIR, "test_npz_round_trip.tek")
+    npz_path = os.path.join(BUILD_DIR, "test_npz_round_trip.npz")
+    save_waveforms(example_waveforms(), tek_path)
+
+    export_waveforms(tek_path, npz_path, chunk_size=3)
+
+    loaded = import_npz(npz_path)
+    assert isinstance(loaded.get("CH1").raw_data, np.memmap)
+    check_round_trip(loaded)
+    check_round_trip(import_npz(npz_path, mmap=False))
+    with np.load(npz_path) as archive:
+        assert list(archive["CH2"]) == example_waveforms().get("CH2").raw_data
+    with zipfile.ZipFile(npz_path) as archive:
+        assert all(i.compress_type == zipfile.ZIP_STORED for i in archive.infolist())
+
+
+@pytest.mark.parametrize(
+    "module,extension", [("h5py", ".h5"), ("pyarrow.parquet", ".parquet")]
+)
+def test_optional_round_trip(module, extension):
+    """
+    Test round trips through formats with optional dependencies.
+    """
+    pytest.importorskip(module)
+    path = os.path.join(BUILD_DIR, f"test_optional_round_trip{extension}")
+
+    export_waveforms(example_waveforms(), path, chunk_size=3)
+
+    check_round_trip(import_waveforms(path))
+
+
+@pytest.mark.parametrize(
+    "module,extension",
+    [("numpy", ".npz"), ("h5py", ".h5"), ("pyarrow.parquet", ".parquet")],
+)
+def test_bundled_round_trip(module, extension):
+    """
+    Test round trips of bundled channel names containing "/".
+    """
+    pytest.importorskip(module)
+    path = os.path.join(BUILD_DIR, f"test_bundled_round_trip{extension}")
+    bundled = Waveforms(
+        [
+            Waveform(f"{name}/{wf.channel}", wf.metadata, wf.raw_data)
+            for name in ["A", "B"]
+            for wf in example_waveforms().all()
+        ]
+    )
+
+    export_waveforms(bundled, path)
+
+    check_round_trip(import_waveforms(path), bundled)
+
+
+@pytest.mark.parametrize(
+    "module,extension",
+    [("numpy", ".npz"), ("h5py", ".h5"), ("pyarrow.parquet", ".parquet")],
+)
+def test_mixed_width_round_trip(module, extension):
+    """
+    Test round trips of 8-bit channels alongside big-endian 16-bit channels, as
+    transferred 2 bytes wide from the oscilloscope.
+    """
+    pytest.importorskip(module)
+    path = os.path.join(BUILD_DIR, f"test_mixed_width_round_trip{extension}")
+    metadata = WaveformMetadata(1.6e-9, -504e-6, 20e-3 / 256, 0, 0)
+    original = Waveforms(
+        [
+            Waveform("CH1", metadata, np.array([1, -2, 127], dtype=np.int8)),
+            Waveform("CH2", metadata, np.array([300, -300, 32767, 0], dtype=">i2")),
+        ]
+    )
+
+    export_waveforms(original, path, chunk_size=3)
+
+    loaded = import_waveforms(path)
+    for expected in original.all():
+        raw_data = np.asarray(loaded.get(expected.channel).raw_data)
+        assert raw_data.dtype.kind == "i"
+        assert raw_data.dtype.itemsize == expected.raw_data.dtype.itemsize
+        assert raw_data.tolist() == expected.raw_data.tolist()
@@ -7,7 +7,13 @@ import io
 import numpy as np
 
 from tekscope.waveform import Waveform, Waveforms, WaveformMetadata
-from tekscope.io import save_waveforms, load_waveforms, write_waveforms, read_waveforms
+from tekscope.io import (
+    save_waveforms,
+    load_waveforms,
+    write_waveforms,
+    read_waveforms,
+    memmap_waveforms,
+)
 
 from .context import BUILD_DIR
 
@@ -87,3 +93,29 @@ def test_save_and_load_waveforms():
     assert np.isclose(loaded_wf2.metadata.v_mult, 80e-3)
     assert np.isclose(loaded_wf2.metadata.v_off, 0)
     assert np.isclose(loaded_wf2.metadata.v_zero, 0)
+
+
+def test_memmap_waveforms():
+    """
+    Test the `memmap_waveforms` function.
+    """
+    metadata1 = WaveformMetadata(1.6e-9, -504e-6, 20e-3, -125, 0)
+    raw_data1 = [1, 2, 3, 4, 5, 6, 7, 8]
+    wf1 = Waveform("CH1", metadata1, raw_data1)
+
+    metadata2 = WaveformMetadata(1.6e-9, -504e-6, 80e-3, 0, 0)
+    raw_data2 = [-8, -7, -6, -5]
+    wf2 = Waveform("CH2", metadata2, raw_data2)
+
+    save_path = os.path.join(BUILD_DIR, "test_memmap_waveforms.tek")
+    save_waveforms(Waveforms([wf1, wf2]), save_path)
+
+    mapped_waveforms = memmap_waveforms(save_path)
+
+    mapped_wf1 = mapped_waveforms.get("CH1")
+    mapped_wf2 = mapped_waveforms.get("CH2")
+
+    assert isinstance(mapped_wf1.raw_data, np.memmap)
+    assert mapped_wf1.raw_data.tolist() == raw_data1
+    assert mapped_wf2.raw_data.tolist() == raw_data2
+    assert np.isclose(mapped_wf2.metadata.v_mult, 80e-3)
@@ -0,0 +1,53 @@
+"""
+Tests for streaming a decimated live view of waveforms.
+"""
+
+import numpy as np
+
+from tekscope import Oscilloscope
+from tekscope.live import LiveFeed, LiveFrame, FrameRate
+from tekscope.simulator import SimulatedOscilloscope
+from tekscope.waveform import Waveform, WaveformMetadata
+
+
+def test_live_frame():
+    """
+    Test decimating a waveform into min/max bins.
+    """
+    raw_data = np.array([0, 4, -2, 1, 3, 3, 8, -8, 5], dtype=np.int8)
+    waveform = Waveform("CH1", WaveformMetadata(1e-9, 1e-6, 0.5, 0.0, 1.0), raw_data)
+    frame = LiveFrame.from_waveform(waveform, 4)
+
+    assert np.allclose(frame.time, 1e-6 + 2e-9 * np.arange(4))
+    assert np.allclose(frame.low, [1.0, 0.0, 2.5, -3.0])
+    assert np.allclose(frame.high, [3.0, 1.5, 2.5, 5.0])
+    x, y = frame.polyline()
+    assert np.allclose(x[:4], [1e-6, 1e-6, 1e-6 + 2e-9, 1e-6 + 2e-9])
+    assert np.allclose(y[:4], [1.0, 3.0, 0.0, 1.5])
+
+    rate = FrameRate(window=2)
+    for now in [0.0, 1.0, 1.5, 2.0]:
+        rate.tick(now)
+    assert rate.rate() == 2.0
+
+
+def test_live_feed():
+    """
+    Test retrieving decimated frames of a window in the background.
+    """
+    with SimulatedOscilloscope(record_length=10000, sources=["CH1", "CH2"]) as sim:
+        osc = Oscilloscope(sim.host, sim.port)
+        with LiveFeed(osc.soc, ["CH1", "CH2", "CH3"], 100, 1001, 3000) as feed:
+            sequence, frames = feed.wait(timeout=5.0)
+            sequence, _ = feed.wait(sequence, timeout=5.0)
+        osc.close()
+
+        assert sequence >= 2
+        assert sorted(frames) == ["CH1", "CH2"]
+        expected = sim.waveform("CH1", 0)[1000:3000].reshape(100, 20)
+        frame = frames["CH1"]
+        assert len(frame.low) == 100
+        assert np.allclose(frame.low, expected.min(axis=1) * 4e-3)
+        assert np.allclose(frame.high, expected.max(axis=1) * 4e-3)
+        assert np.isclose(frame.time[1] - frame.time[0], 20 * sim.t_incr)
+        assert feed.rate.rate() > 0
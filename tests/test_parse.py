@@ -4,9 +4,16 @@ Tests for data parsing.
 
 import os
 import pytest
+import numpy as np
 import matplotlib.pyplot as plt
 
-from tekscope.parse import parse_ribinary_seq
+from tekscope.parse import (
+    parse_ribinary_seq,
+    parse_preamble,
+    parse_curve,
+    parse_ascii_curve,
+    AsciiDecoder,
+)
 from .context import DATA_DIR
 
 
@@ -20,3 +27,56 @@ def test_parse_ribinary_seq():
         seq = parse_ribinary_seq(data, 1)
         plt.plot(seq)
         plt.show()
+
+
+def test_parse_preamble():
+    """
+    Test parsing a complete WFMOUTPRE? response and decoding a matching curve.
+    """
+    preamble = parse_preamble(
+        b'2;16;BINARY;RI;LSB;"Ch2, DC coupling, 1.0V/div";4;Y;LINEAR;"s";1.0E-9;'
+        b'-2.0E-9;0;"V";1.5625E-4;-10;0.0E+0;TIME;ANALOG;0.0E+0;0.0E+0;0.0E+0\n'
+    )
+
+    assert preamble.byt_nr == 2
+    assert preamble.bit_nr == 16
+    assert preamble.encdg == "BINARY"
+    assert preamble.byt_or == "LSB"
+    assert preamble.wfid == "Ch2, DC coupling, 1.0V/div"
+    assert preamble.nr_pt == 4
+    assert preamble.xunit == "s"
+    assert preamble.yunit == "V"
+    assert preamble.num_bytes() == 8
+    assert np.isclose(preamble.metadata().v_mult, 1.5625e-4)
+    assert np.isclose(preamble.metadata().v_off, -10)
+
+    curve = np.array([1, -2, 300, -32768], dtype="<i2").tobytes()
+    assert parse_curve(curve, preamble).tolist() == [1, -2, 300, -32768]
+
+
+def test_parse_preamble_disabled_source():
+    """
+    Test that a truncated WFMOUTPRE? response is rejected.
+    """
+    assert parse_preamble(b'1;8;BINARY;RI;MSB;"Ch3"\n') is None
+
+
+def test_ascii_decoder():
+    """
+    Test that streamed ASCII decoding matches bulk decoding for any chunking.
+    """
+    values = np.random.default_rng(0).integers(-32768, 32768, 1000)
+    data = ",".join(map(str, values)).encode("utf-8") + b"\n"
+
+    assert parse_ascii_curve(data).tolist() == values.tolist()
+    for chunk_size in [1, 7, 4096]:
+        decoder = AsciiDecoder()
+        decoded = [
+            decoder.feed(data[i : i + chunk_size])
+            for i in range(0, len(data), chunk_size)
+        ]
+        decoded.append(decoder.finish())
+        assert np.concatenate(decoded).tolist() == values.tolist()
+
+    with pytest.raises(ValueError):
+        parse_ascii_curve(b"1,2,x,4")
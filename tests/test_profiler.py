@@ -0,0 +1,95 @@
+"""
+Tests for profiling the stages of an oscilloscope session.
+"""
+
+import io
+import socket
+import tracemalloc
+
+import pytest
+
+from tekscope import Oscilloscope, profiler
+from tekscope.io import write_waveforms
+from tekscope.simulator import SimulatedOscilloscope
+
+
+def test_session_profiler():
+    """
+    Test profiling a retrieval and save from a simulated oscilloscope.
+    """
+    with SimulatedOscilloscope(record_length=100000, sources=["CH1", "CH2"]) as sim:
+        osc = Oscilloscope(sim.host, sim.port, profile=True)
+        waveforms = osc.retrieve_all_waveforms()
+        with osc.profiling():
+            write_waveforms(io.BytesIO(), waveforms)
+        osc.close()
+
+    stages = osc.profiler.stages
+    assert sorted(stages) == ["construct", "parse", "save", "transfer"]
+    assert stages["transfer"].calls > 2
+    assert stages["transfer"].num_bytes == 200000
+    assert stages["save"].num_bytes == 200000
+    # Preambles of all 20 sources and the 2 enabled curves are parsed.
+    assert stages["parse"].calls == 22
+    assert stages["construct"].calls == 3
+    assert all(stats.wall > 0 for stats in stages.values())
+    assert stages["transfer"].peak >= 100000
+    assert osc.profiler.samples == 200000
+    assert not tracemalloc.is_tracing()
+    assert profiler.stage("parse") is profiler.NULL_STAGE
+
+    report = osc.profiler.report().splitlines()
+    assert [line.split()[0] for line in report[2:6]] == list(profiler.STAGES)
+    assert report[-1] == "200000 samples captured"
+
+
+def test_concurrent_sessions():
+    """
+    Test that two profiled sessions only record their own transfers.
+    """
+    with SimulatedOscilloscope(record_length=1000, sources=["CH1"]) as sim:
+        first = Oscilloscope(sim.host, sim.port, profile=True)
+        second = Oscilloscope(sim.host, sim.port, profile=True)
+        first.retrieve_all_waveforms()
+        second.retrieve_waveform("CH1")
+        second.retrieve_waveform("CH1")
+        assert profiler.stage("parse") is profiler.NULL_STAGE
+        assert tracemalloc.is_tracing()
+        first.close()
+        assert tracemalloc.is_tracing()
+        second.close()
+
+    assert first.profiler.samples == 1000
+    assert second.profiler.samples == 2000
+    assert second.profiler.stages["parse"].calls == 4
+    assert not tracemalloc.is_tracing()
+
+
+def test_failed_connection():
+    """
+    Test that no profiler is left active when connecting fails.
+    """
+    with socket.socket() as listener:
+        listener.bind(("127.0.0.1", 0))
+        port = listener.getsockname()[1]
+    with pytest.raises(OSError):
+        Oscilloscope("127.0.0.1", port, profile=True)
+
+    assert not tracemalloc.is_tracing()
+    assert profiler.stage("parse") is profiler.NULL_STAGE
+
+
+def test_nested_stages():
+    """
+    Test that the memory peak of a stage includes the peaks of nested stages.
+    """
+    with profiler.SessionProfiler() as session:
+        with profiler.stage("outer"):
+            with profiler.stage("inner"):
+                data = bytearray(1 << 20)
+            del data
+            small = bytearray(1000)
+    del small
+
+    assert session.stages["inner"].peak >= 1 << 20
+    assert session.stages["outer"].peak >= 1 << 20
@@ -2,9 +2,20 @@
 Tests of API for directly interacting with the oscilloscope's socket server.
 """
 
+import time
 import socket
 import pytest
-from tekscope.raw import send_command, query_ascii
+import numpy as np
+
+from tekscope import Oscilloscope
+from tekscope.raw import (
+    send_command,
+    query_ascii,
+    query_binary,
+    Connection,
+    IncompleteTransferError,
+)
+from tekscope.simulator import SimulatedOscilloscope, SimulatedFault
 
 
 @pytest.mark.skip(reason="testing framework unimplemented")
@@ -16,3 +27,65 @@ def test_send_command():
         soc.connect(("127.0.0.1", 12345))
         send_command(soc, "test")
         print(query_ascii(soc))
+
+
+def test_query_binary_short_reads():
+    """
+    Test receiving a binary block that arrives one byte at a time.
+    """
+    with SimulatedOscilloscope(record_length=50, fragment=1) as sim:
+        soc = Connection(sim.host, sim.port)
+        send_command(soc, "CURVE?")
+        data = query_binary(soc, timeout=5.0)
+        soc.close()
+
+    assert bytes(data) == sim.waveform("CH1", 0).tobytes()
+
+
+def test_query_binary_timeout():
+    """
+    Test that a stalled binary block times out with the data received so far.
+    """
+    faults = [SimulatedFault(SimulatedFault.STALL, 123)]
+    with SimulatedOscilloscope(record_length=1000, faults=faults) as sim:
+        soc = Connection(sim.host, sim.port)
+        send_command(soc, "CURVE?")
+        with pytest.raises(IncompleteTransferError) as err:
+            query_binary(soc, bytearray(1000), timeout=0.2)
+        soc.close()
+
+    assert err.value.length == 1000
+    assert bytes(err.value.data) == sim.waveform("CH1", 0).tobytes()[:123]
+
+
+@pytest.mark.parametrize("kind", [SimulatedFault.STALL, SimulatedFault.DISCONNECT])
+def test_resumed_transfer(kind):
+    """
+    Test that an interrupted transfer resumes by re-requesting only the missing points.
+    """
+    faults = [SimulatedFault(kind, 300), SimulatedFault(kind, 200)]
+    with SimulatedOscilloscope(record_length=1000, faults=faults) as sim:
+        osc = Oscilloscope(sim.host, sim.port)
+        waveform = osc.retrieve_waveform("CH1", timeout=0.5, retries=2)
+        osc.close()
+
+    assert np.array_equal(waveform.raw_data, sim.waveform("CH1", 0))
+    assert "DATA:START 301" in sim.log
+    assert "DATA:START 501" in sim.log
+
+
+@pytest.mark.parametrize("query", ["HORIZONTAL:RECORDLENGTH?", "WFMOUTPRE?"])
+def test_stalled_query_timeout(query):
+    """
+    Test that a stalled ASCII reply during a retrieval times out instead of hanging.
+    """
+    faults = [SimulatedFault(SimulatedFault.STALL, 0, query)]
+    with SimulatedOscilloscope(record_length=1000, faults=faults) as sim:
+        osc = Oscilloscope(sim.host, sim.port)
+        start = time.monotonic()
+        with pytest.raises(socket.timeout):
+            osc.retrieve_waveform("CH1", timeout=0.5, retries=1)
+        elapsed = time.monotonic() - start
+        osc.close()
+
+    assert elapsed < 2.0
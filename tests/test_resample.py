@@ -0,0 +1,53 @@
+"""
+Tests for interpolating and resampling waveforms.
+"""
+
+import os
+import numpy as np
+
+from tekscope.waveform import Waveform, WaveformMetadata, Waveforms
+from tekscope.io import save_waveforms, memmap_waveforms
+from tekscope.resample import interpolate, common_time_base, resample
+
+from .context import BUILD_DIR
+
+
+def test_resample():
+    """
+    Test resampling memory-mapped waveforms with different time increments.
+    """
+    t = np.arange(1000) * 1e-9
+    ch1 = np.round(100 * np.sin(2e6 * np.pi * t)).astype(np.int8)
+    t2 = 10e-9 + np.arange(250) * 4e-9
+    ch2 = np.round(100 * np.sin(2e6 * np.pi * t2)).astype(np.int8)
+    save_path = os.path.join(BUILD_DIR, "test_resample.tek")
+    save_waveforms(
+        Waveforms(
+            [
+                Waveform("CH1", WaveformMetadata(1e-9, 0.0, 0.01, 0.0, 0.0), ch1),
+                Waveform("CH2", WaveformMetadata(4e-9, 10e-9, 0.01, 0.0, 0.0), ch2),
+            ]
+        ),
+        save_path,
+    )
+    waveforms = memmap_waveforms(save_path)
+
+    window = waveforms.window(100e-9, 200e-9)
+    assert isinstance(window.get("CH1").raw_data, np.memmap)
+    assert len(window.get("CH1").raw_data) == 101
+    assert len(window.get("CH2").raw_data) == 25
+
+    times = common_time_base(waveforms)
+    assert np.isclose(times[0], 10e-9)
+    assert np.isclose(times[-1], 10e-9 + 249 * 4e-9)
+    assert np.allclose(np.diff(times), 1e-9)
+
+    resampled = resample(waveforms, t0=100e-9, t1=500e-9)
+    ch1_volts = np.array(resampled.get("CH1").voltage())
+    ch2_volts = np.array(resampled.get("CH2").voltage())
+    assert np.isclose(resampled.get("CH1").metadata.t_zero, 100e-9)
+    assert len(ch1_volts) == 401
+    assert np.allclose(ch1_volts, ch1[100:501] * 0.01)
+    assert np.max(np.abs(ch1_volts - ch2_volts)) < 0.05
+
+    assert np.isnan(interpolate(waveforms.get("CH2"), np.array([0.0, 2e-6]))).all()
@@ -0,0 +1,55 @@
+"""
+Tests for frequency-domain analysis.
+"""
+
+import os
+import numpy as np
+
+from tekscope.waveform import Waveform, Waveforms, WaveformMetadata
+from tekscope.io import save_waveforms
+from tekscope.spectrum import fft, welch
+
+from .context import BUILD_DIR
+
+
+def sine_waveform(channel, freq, t_incr, length, amplitude=100):
+    """
+    Builds a quantized sine wave with 10 mV per digitizing level.
+    """
+    metadata = WaveformMetadata(t_incr, 0, 10e-3, 0, 0)
+    time = np.arange(length) * t_incr
+    raw_data = np.round(amplitude * np.sin(2 * np.pi * freq * time)).astype(np.int8)
+    return Waveform(channel, metadata, raw_data.tolist())
+
+
+def test_fft():
+    """
+    Test that `fft` recovers the frequency and amplitude of a sinusoid.
+    """
+    waveform = sine_waveform("CH1", 1e6, 1e-8, 1000)
+    spectrum = fft(waveform)
+
+    peak = np.argmax(spectrum.values)
+    assert np.isclose(spectrum.freq[peak], 1e6)
+    assert np.isclose(spectrum.values[peak], 1.0, rtol=1e-2)
+
+
+def test_welch_from_file():
+    """
+    Test that `welch` on a `.tek` file matches `welch` on the loaded waveform and
+    conserves signal power.
+    """
+    wf1 = sine_waveform("CH1", 1e6, 1e-8, 100000)
+    wf2 = sine_waveform("CH2", 2.5e6, 1e-8, 100000)
+    save_path = os.path.join(BUILD_DIR, "test_welch_from_file.tek")
+    save_waveforms(Waveforms([wf1, wf2]), save_path)
+
+    from_file = welch(save_path, "CH2", nperseg=1024, batch=7)
+    from_memory = welch(wf2, nperseg=1024)
+
+    assert np.allclose(from_file.values, from_memory.values)
+    peak = np.argmax(from_file.values)
+    assert np.isclose(from_file.freq[peak], 2.5e6, atol=from_file.freq[1])
+
+    power = np.sum(from_file.values) * from_file.freq[1]
+    assert np.isclose(power, 0.5, rtol=2e-2)
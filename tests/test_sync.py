@@ -0,0 +1,56 @@
+"""
+Tests for synchronized acquisition across multiple oscilloscopes.
+"""
+
+import os
+import numpy as np
+
+from tekscope import Oscilloscope
+from tekscope.io import load_waveforms
+from tekscope.simulator import SimulatedOscilloscope
+from tekscope.sync import AcquisitionCoordinator, split_bundle
+
+from .context import BUILD_DIR
+
+
+def test_acquisition_coordinator():
+    """
+    Test acquiring from two simulated oscilloscopes and saving a combined bundle.
+    """
+    sims = {
+        "A": SimulatedOscilloscope(
+            record_length=500, sources=["CH1", "CH2"], trigger_interval=0.01
+        ),
+        "B": SimulatedOscilloscope(
+            record_length=500, t_offset=5e-9, trigger_interval=0.02, seed=1
+        ),
+    }
+    scopes = {name: Oscilloscope(sim.host, sim.port) for name, sim in sims.items()}
+    coordinator = AcquisitionCoordinator(scopes, timeout=5.0)
+
+    try:
+        capture = coordinator.acquire()
+        save_path = os.path.join(BUILD_DIR, "test_acquisition_coordinator.tek")
+        capture.save(save_path, deskew={"B": 5e-9})
+    finally:
+        coordinator.close()
+        for scope in scopes.values():
+            scope.close()
+        for sim in sims.values():
+            sim.close()
+
+    acq = capture.acq()
+    assert all(acq[name] >= 1 for name in sims)
+    assert min(report.skew for report in capture.reports.values()) == 0
+    assert all(report.throughput() > 0 for report in capture.reports.values())
+
+    loaded = split_bundle(load_waveforms(save_path))
+    assert sorted(loaded) == ["A", "B"]
+    assert [wf.channel for wf in loaded["A"].all()] == ["CH1", "CH2"]
+    for name, sim in sims.items():
+        for waveform in loaded[name].all():
+            expected = sim.waveform(waveform.channel, acq[name])
+            assert np.array_equal(waveform.raw_data, expected)
+    assert np.isclose(
+        loaded["A"].get("CH1").metadata.t_zero, loaded["B"].get("CH1").metadata.t_zero
+    )
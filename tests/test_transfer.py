@@ -0,0 +1,160 @@
+"""
+Tests for transferring waveforms from the oscilloscope.
+"""
+
+import io
+import os
+import numpy as np
+import pytest
+
+from tekscope import Oscilloscope
+from tekscope.io import save_waveforms, read_waveform, read_waveforms, memmap_waveforms
+from tekscope.raw import DataEncdg, Connection, IncompleteTransferError
+from tekscope.simulator import SimulatedOscilloscope, SimulatedFault
+from tekscope.profiler import SessionProfiler
+from tekscope.transfer import (
+    set_default_waveform_settings,
+    retrieve_waveform_with_default_settings,
+    negotiate_data_format,
+    detect_bit_nr,
+    retrieve_waveform_parallel,
+)
+
+from .context import BUILD_DIR
+
+
+def test_retrieve_ascii_waveform():
+    """
+    Test retrieving an ASCII-encoded waveform in fragmented chunks.
+    """
+    with SimulatedOscilloscope(record_length=2000, fragment=333) as sim:
+        osc = Oscilloscope(sim.host, sim.port)
+        set_default_waveform_settings(osc.soc, DataEncdg.ASCII, 2)
+        with SessionProfiler() as session:
+            waveform = retrieve_waveform_with_default_settings(osc.soc, "CH1")
+        osc.close()
+
+    assert np.array_equal(waveform.raw_data, sim.waveform("CH1", 0).astype(int) * 256)
+    assert np.isclose(waveform.metadata.v_mult, 4e-3 / 256)
+    curve = ",".join(map(str, waveform.raw_data.tolist())) + "\n"
+    assert session.stages["transfer"].num_bytes == len(curve)
+
+
+def test_negotiate_data_format():
+    """
+    Test that negotiation picks binary encoding at the width of the bit depth.
+    """
+    with SimulatedOscilloscope(record_length=200000) as sim:
+        osc = Oscilloscope(sim.host, sim.port)
+        assert detect_bit_nr(osc.soc, "CH1") == 8
+        assert negotiate_data_format(osc.soc, "CH1", num_points=100000) == (
+            DataEncdg.BINARY,
+            1,
+        )
+        waveform = retrieve_waveform_with_default_settings(osc.soc, "CH1")
+        osc.close()
+
+    assert np.array_equal(waveform.raw_data, sim.waveform("CH1", 0))
+
+
+def test_negotiated_data_format():
+    """
+    Test that retrievals use the negotiated data format and saves stay 8-bit.
+    """
+    with SimulatedOscilloscope(record_length=1000, sources=["CH1", "CH2"]) as sim:
+        osc = Oscilloscope(sim.host, sim.port)
+        encdg, width = osc.negotiate_data_format("CH1", bit_nr=16)
+        waveform = osc.retrieve_waveform("CH2")
+        waveforms = osc.retrieve_all_waveforms(connections=2)
+        file = io.BytesIO()
+        assert osc.save_waveform("CH1", file)
+        osc.close()
+
+    assert encdg in (DataEncdg.BINARY, DataEncdg.ASCII) and width == 2
+    expected = sim.waveform("CH2", 0).astype(int) * 256
+    assert np.array_equal(waveform.raw_data, expected)
+    assert np.array_equal(waveforms.get("CH2").raw_data, expected)
+    file.seek(0)
+    assert np.array_equal(read_waveform(file).raw_data, sim.waveform("CH1", 0))
+    with pytest.raises(ValueError):
+        save_waveforms(waveforms, os.path.join(BUILD_DIR, "test_negotiated.tek"))
+
+
+def test_passthrough_save():
+    """
+    Test that streaming curves straight to disk matches decoding and re-encoding them.
+    """
+    passthrough_path = os.path.join(BUILD_DIR, "test_passthrough_save.tek")
+    decoded_path = os.path.join(BUILD_DIR, "test_passthrough_save_decoded.tek")
+    with SimulatedOscilloscope(record_length=3000, sources=["CH1", "CH4"]) as sim:
+        osc = Oscilloscope(sim.host, sim.port)
+        with open(passthrough_path, "wb") as file:
+            assert osc.save_all_waveforms(file) == ["CH1", "CH4"]
+        stream = io.BytesIO()
+        assert osc.save_waveform("CH4", stream)
+        save_waveforms(osc.retrieve_all_waveforms(), decoded_path)
+        osc.close()
+
+    with open(passthrough_path, "rb") as passthrough, open(
+        decoded_path, "rb"
+    ) as decoded:
+        assert passthrough.read() == decoded.read()
+    stream.seek(0)
+    assert read_waveform(stream).raw_data == sim.waveform("CH4", 0).tolist()
+    waveforms = memmap_waveforms(passthrough_path)
+    assert np.array_equal(waveforms.get("CH1").raw_data, sim.waveform("CH1", 0))
+
+
+def test_failed_passthrough_save():
+    """
+    Test that an interrupted passthrough save leaves only complete waveforms.
+    """
+    faults = [SimulatedFault(SimulatedFault.DISCONNECT, 100)]
+    with SimulatedOscilloscope(record_length=1000, sources=["CH1"]) as sim:
+        osc = Oscilloscope(sim.host, sim.port)
+        stream = io.BytesIO()
+        assert osc.save_waveform("CH1", stream)
+        sim.faults = faults
+        with pytest.raises(IncompleteTransferError):
+            osc.save_waveform("CH1", stream)
+        osc.close()
+
+    stream.seek(0)
+    waveforms = read_waveforms(stream)
+    assert [wf.channel for wf in waveforms.all()] == ["CH1"]
+    assert waveforms.get("CH1").raw_data == sim.waveform("CH1", 0).tolist()
+
+
+def test_parallel_transfer():
+    """
+    Test retrieving channels and sample windows over several connections.
+    """
+    sources = ["CH1", "CH2", "CH4"]
+    with SimulatedOscilloscope(record_length=5001, sources=sources) as sim:
+        osc = Oscilloscope(sim.host, sim.port)
+        waveforms = osc.retrieve_all_waveforms(connections=3)
+        with pytest.raises(ValueError):
+            osc.retrieve_all_waveforms(retries=2, connections=3)
+        waveform = retrieve_waveform_parallel(
+            lambda: Connection(sim.host, sim.port), "CH2", connections=4
+        )
+        osc.close()
+
+    assert [wf.channel for wf in waveforms.all()] == sources
+    for wf in waveforms.all():
+        assert np.array_equal(wf.raw_data, sim.waveform(wf.channel, 0))
+    assert np.array_equal(waveform.raw_data, sim.waveform("CH2", 0))
+    assert "DATA:START 3754" in sim.log
+
+
+def test_parallel_transfer_empty_record():
+    """
+    Test retrieving an empty waveform over several connections.
+    """
+    with SimulatedOscilloscope(record_length=0) as sim:
+        waveform = retrieve_waveform_parallel(
+            lambda: Connection(sim.host, sim.port), "CH1", connections=4
+        )
+
+    assert waveform.raw_data.size == 0
+    assert "CURVE?" not in sim.log
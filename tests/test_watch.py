@@ -0,0 +1,86 @@
+"""
+Tests for watching the oscilloscope for new acquisitions.
+"""
+
+import time
+import asyncio
+import threading
+import numpy as np
+
+from tekscope import Oscilloscope
+from tekscope.simulator import SimulatedOscilloscope
+
+
+def _trigger_later(sim, count, delay=0.05):
+    """
+    Triggers the simulator `count` times after a delay, from another thread.
+    """
+
+    def trigger():
+        time.sleep(delay)
+        for _ in range(count):
+            sim.trigger()
+
+    thread = threading.Thread(target=trigger)
+    thread.start()
+    return thread
+
+
+def test_watch():
+    """
+    Test that waveforms are only transferred when the acquisition count changes.
+    """
+    with SimulatedOscilloscope(record_length=200, sources=["CH1", "CH2"]) as sim:
+        osc = Oscilloscope(sim.host, sim.port)
+        osc.start_acquire()
+        watcher = osc.watch(interval=0.01, max_interval=0.02)
+        frames = iter(watcher)
+
+        _trigger_later(sim, 1)
+        waveforms = next(frames)
+        assert watcher.last_acq == 1
+        assert [wf.channel for wf in waveforms.all()] == ["CH1", "CH2"]
+        assert np.array_equal(waveforms.get("CH1").raw_data, sim.waveform("CH1", 1))
+
+        _trigger_later(sim, 3).join()
+        next(frames)
+        assert watcher.last_acq == 4
+        assert watcher.skipped == 2
+        assert watcher.transfers == 2
+        assert watcher.polls > watcher.transfers
+
+        watcher.stop()
+        assert not list(frames)
+        osc.close()
+
+
+def test_watch_async():
+    """
+    Test that a slow asynchronous consumer only receives the newest frame.
+    """
+
+    async def consume(watcher, sim):
+        received = []
+        async for waveforms in watcher:
+            received.append(waveforms)
+            if len(received) == 1:
+                for _ in range(3):
+                    sim.trigger()
+                    await asyncio.sleep(0.1)
+            else:
+                watcher.stop()
+        return received
+
+    with SimulatedOscilloscope(record_length=200) as sim:
+        osc = Oscilloscope(sim.host, sim.port)
+        osc.start_acquire()
+        watcher = osc.watch(interval=0.01, max_interval=0.02)
+        thread = _trigger_later(sim, 1, delay=0.1)
+        received = asyncio.run(consume(watcher, sim))
+        thread.join()
+        osc.close()
+
+    assert len(received) == 2
+    assert watcher.last_acq == 4
+    assert watcher.transfers == 4
+    assert watcher.skipped == 2
@@ -4,7 +4,7 @@ Tests for interacting with waveforms in memory.
 
 import numpy as np
 
-from tekscope.waveform import Waveform, WaveformMetadata
+from tekscope.waveform import Waveform, WaveformMetadata, Waveforms
 
 
 def test_waveform():
@@ -22,3 +22,25 @@ def test_waveform():
         np.isclose(np.array(time), np.array([1.6e-9 * i + -504e-6 for i in range(8)]))
     )
     assert np.all(np.isclose(np.array(voltage), 20e-3 * (np.array(raw_data) + 125)))
+
+
+def test_window():
+    """
+    Test extracting a time window from waveforms.
+    """
+    metadata = WaveformMetadata(0.5, -1.0, 1.0, 0.0, 0.0)
+    waveform = Waveform("CH1", metadata, np.arange(10, dtype=np.int8))
+
+    window = waveform.window(0.0, 1.25)
+    assert window.raw_data.tolist() == [2, 3, 4]
+    assert window.raw_data.base is waveform.raw_data
+    assert window.metadata.t_zero == 0.0
+    assert np.allclose(window.time(), np.array(waveform.time())[2:5])
+
+    assert waveform.window(-5.0, 100.0).raw_data.tolist() == list(range(10))
+    assert len(waveform.window(10.0, 20.0).raw_data) == 0
+    assert len(waveform.window(1.0, 0.0).raw_data) == 0
+
+    waveforms = Waveforms([waveform, Waveform("CH2", metadata, list(range(10)))])
+    windows = waveforms.window(-1.0, -0.5)
+    assert windows.get("CH2").raw_data == [0, 1]